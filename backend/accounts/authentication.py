@@ -0,0 +1,107 @@
+"""
+Autenticación JWT sin consultar la tabla de usuarios en cada petición.
+
+``CustomTokenObtainPairSerializer`` guarda en el token el rol, el nombre y
+``is_superuser``. En métodos de solo lectura ``StatelessJWTAuthentication``
+construye con esas claims un ``ClaimsUser`` (con ``is_admin()``,
+``is_creator()`` e ``is_viewer()`` como el modelo) en lugar de cargar el User.
+Las peticiones que escriben cargan siempre el usuario real.
+
+Revocación: el estado del usuario (activo, rol, superusuario) se lee como
+mucho una vez cada ``JWT_USER_STATE_TTL`` segundos por proceso. Si ya no
+coincide con las claims (usuario desactivado, eliminado o con otro rol) se
+recurre a la carga normal, que rechaza el token o devuelve el usuario con sus
+datos actuales. Con ``JWT_USER_STATE_TTL = 0`` no se comprueba nada y las
+claims se aceptan tal cual hasta que el token caduca.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+
+class ClaimsUser(TokenUser):
+    """Usuario de solo lectura construido con las claims del token"""
+
+    @property
+    def role(self):
+        return self.token.get('role')
+
+    def is_admin(self):
+        return self.role == 'admin' or self.is_superuser
+
+    def is_creator(self):
+        return self.role == 'creator' or self.is_admin()
+
+    def is_viewer(self):
+        return self.role == 'viewer' or self.is_creator()
+
+
+class UserStateCache:
+    """(is_active, role, is_superuser) por usuario, válido durante ttl segundos"""
+
+    def __init__(self, ttl, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+
+        # None si el usuario ya no existe
+        state = User.objects.filter(pk=user_id).values_list('is_active', 'role', 'is_superuser').first()
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, state)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return state
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_states = UserStateCache(settings.JWT_USER_STATE_TTL)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication que evita cargar el User en peticiones de solo lectura"""
+
+    def authenticate(self, request):
+        if request.method not in SAFE_METHODS:
+            return super().authenticate(request)
+
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return self.get_token_user(validated_token), validated_token
+
+    def get_token_user(self, validated_token):
+        user = ClaimsUser(validated_token)
+        # Tokens emitidos antes de añadir las claims: carga normal
+        if user.role is None or api_settings.USER_ID_CLAIM not in validated_token:
+            return self.get_user(validated_token)
+        if user_states.ttl and user_states.get(user.pk) != (True, user.role, user.is_superuser):
+            return self.get_user(validated_token)
+        return user
@@ -0,0 +1,15 @@
+"""
+Al guardar o eliminar un usuario se descarta su estado en la caché de
+StatelessJWTAuthentication (authentication.py). Solo afecta a este proceso;
+en los demás el estado caduca en JWT_USER_STATE_TTL segundos.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import user_states
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    user_states.discard(instance.pk)
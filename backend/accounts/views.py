@@ -13,6 +13,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token = super().get_token(user)
         token['role'] = user.role
         token['username'] = user.username
+        # Con role basta para resolver permisos sin cargar el usuario (authentication.py)
+        token['is_superuser'] = user.is_superuser
         return token
 
 
@@ -0,0 +1,71 @@
+"""
+Compresión de respuestas según Accept-Encoding (brotli o gzip).
+
+Solo se comprimen respuestas de texto/JSON que superan
+``API_COMPRESSION_MIN_SIZE`` bytes; los archivos ya comprimidos (xlsx, zip,
+parquet) y las respuestas en streaming se envían tal cual.
+
+gzip lo hace ``GZipMiddleware`` de Django, que añade relleno aleatorio a cada
+respuesta como mitigación de BREACH. brotli no tiene un mecanismo equivalente,
+así que solo se usa para peticiones sin credenciales (sin Authorization ni
+cookies), cuya respuesta no lleva tokens ni datos personales: el documento
+público de una encuesta, por ejemplo. brotli es opcional: sin el paquete se
+usa siempre gzip.
+"""
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'application/xml', 'text/',
+)
+
+accepts_br = _lazy_re_compile(r'\bbr\b')
+
+
+def has_credentials(request):
+    return bool(request.META.get('HTTP_AUTHORIZATION') or request.META.get('HTTP_COOKIE'))
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.API_COMPRESSION_BROTLI_QUALITY)
+    return compress_string(content)
+
+
+class CompressionMiddleware(GZipMiddleware):
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if len(response.content) < settings.API_COMPRESSION_MIN_SIZE:
+            return response
+        if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return response
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is None or has_credentials(request) or not accepts_br.search(accept_encoding):
+            return super().process_response(request, response)
+
+        # Que las cachés intermedias distingan la versión comprimida
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = compress(response.content, 'br')
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = 'br'
+        # El cuerpo ya no es byte a byte el mismo: el ETag pasa a ser débil
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -117,17 +118,45 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson si está instalado; mismo formato que el JSON estándar de DRF
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'config.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Compresión de respuestas (config/middleware.py): gzip de Django (con relleno
+# contra BREACH) o, sin credenciales en la petición, brotli si el cliente lo
+# acepta y el paquete está instalado; solo por encima de este tamaño
+API_COMPRESSION_MIN_SIZE = config('API_COMPRESSION_MIN_SIZE', default=1024, cast=int)
+API_COMPRESSION_BROTLI_QUALITY = config('API_COMPRESSION_BROTLI_QUALITY', default=4, cast=int)
+
+# Caché (por defecto en memoria del proceso; con varios procesos conviene una
+# compartida, p. ej. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=24),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
 }
+# Segundos durante los que StatelessJWTAuthentication da por bueno el estado
+# (activo, rol) de un usuario sin volver a consultarlo; 0 desactiva la comprobación
+JWT_USER_STATE_TTL = config('JWT_USER_STATE_TTL', default=60, cast=int)
 
 # CORS
 CORS_ALLOWED_ORIGINS = [
@@ -145,3 +174,32 @@ SPECTACULAR_SETTINGS = {
     'SERVE_INCLUDE_SCHEMA': False,
 }
 
+# Encuestas
+# Tamaño de la caché en memoria de esquemas compilados (validación de respuestas)
+SURVEY_SCHEMA_CACHE_SIZE = config('SURVEY_SCHEMA_CACHE_SIZE', default=256, cast=int)
+# Envío de respuestas por lotes (surveys/respond/batch/)
+SURVEY_BATCH_MAX_ITEMS = config('SURVEY_BATCH_MAX_ITEMS', default=1000, cast=int)
+SURVEY_BATCH_CHUNK_SIZE = config('SURVEY_BATCH_CHUNK_SIZE', default=200, cast=int)
+# Ingesta de respuestas: 'sync' guarda en la petición; 'spool' anexa el envío
+# validado a un archivo local, responde 202 y el comando drain_spool lo guarda
+SURVEY_INGEST_MODE = config('SURVEY_INGEST_MODE', default='sync')
+SURVEY_SPOOL_PATH = config('SURVEY_SPOOL_PATH', default=str(BASE_DIR / 'spool' / 'responses.ndjson'))
+SURVEY_SPOOL_FSYNC = config('SURVEY_SPOOL_FSYNC', default=True, cast=bool)
+# drain_spool vacía el archivo cuando está todo procesado y supera este tamaño
+SURVEY_SPOOL_COMPACT_BYTES = config('SURVEY_SPOOL_COMPACT_BYTES', default=64 * 1024 * 1024, cast=int)
+# Endpoints públicos (responder y ver encuesta) como vistas asíncronas; requiere
+# servir la aplicación con ASGI (uvicorn config.asgi:application)
+SURVEY_ASYNC_VIEWS = config('SURVEY_ASYNC_VIEWS', default=False, cast=bool)
+# Segundos que vive en caché el JSON pre-renderizado de la vista pública
+SURVEY_PUBLIC_CACHE_TIMEOUT = config('SURVEY_PUBLIC_CACHE_TIMEOUT', default=3600, cast=int)
+# Segundos que vive en caché el conjunto de encuestas visibles de cada usuario
+# (surveys/acl.py); las señales lo borran al cambiar sus asignaciones. Solo se
+# usa con una caché compartida (no locmem); 0 consulta siempre la base
+SURVEY_ACL_CACHE_TIMEOUT = config('SURVEY_ACL_CACHE_TIMEOUT', default=300, cast=int)
+# Exportaciones a Excel en segundo plano: 'thread' las genera un pool de hilos
+# del proceso web; 'command' las deja al comando run_export_jobs
+SURVEY_EXPORT_WORKER = config('SURVEY_EXPORT_WORKER', default='thread')
+SURVEY_EXPORT_THREADS = config('SURVEY_EXPORT_THREADS', default=2, cast=int)
+SURVEY_EXPORT_DIR = config('SURVEY_EXPORT_DIR', default=str(BASE_DIR / 'exports'))
+# Segundos tras los que un trabajo pendiente o en curso se da por perdido
+SURVEY_EXPORT_TIMEOUT = config('SURVEY_EXPORT_TIMEOUT', default=1800, cast=int)
@@ -0,0 +1,76 @@
+"""
+Qué encuestas puede ver cada usuario.
+
+Los administradores ven todas. El resto ve las que creó y aquellas en las que
+está asignado como visualizador, sin joins con ``assigned_viewers`` ni
+``.distinct()``:
+
+- Con una caché compartida entre procesos (``CACHE_BACKEND`` distinto de
+  locmem/dummy), el conjunto de ids se calcula con una sola consulta (UNION)
+  y se guarda por usuario durante ``SURVEY_ACL_CACHE_TIMEOUT`` segundos.
+  signals.py lo borra cuando cambian las asignaciones del usuario, cuando
+  crea una encuesta o cuando una encuesta cambia de creador.
+- Con una caché local (la de por defecto) la invalidación no llegaría a los
+  demás procesos y un visualizador retirado seguiría viendo la encuesta, así
+  que se consulta la base cada vez: un EXISTS para comprobar una encuesta y
+  una subconsulta para filtrar el listado.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import Survey
+
+SurveyViewer = Survey.assigned_viewers.through
+
+# Backends cuyo contenido no comparten los procesos
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_enabled():
+    return (
+        settings.SURVEY_ACL_CACHE_TIMEOUT > 0
+        and settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+    )
+
+
+def cache_key(user_id):
+    return f'survey-acl:{user_id}'
+
+
+def viewable_survey_ids(user):
+    """frozenset con los ids de las encuestas creadas o asignadas al usuario (caché compartida)"""
+    key = cache_key(user.pk)
+    ids = cache.get(key)
+    if ids is None:
+        assigned = SurveyViewer.objects.filter(user_id=user.pk).values_list('survey_id', flat=True)
+        created = Survey.objects.filter(creator_id=user.pk).order_by().values_list('id', flat=True)
+        ids = frozenset(assigned.union(created))
+        cache.set(key, ids, settings.SURVEY_ACL_CACHE_TIMEOUT)
+    return ids
+
+
+def viewable_surveys(user):
+    """Encuestas creadas o asignadas al usuario"""
+    if cache_enabled():
+        return Survey.objects.filter(id__in=viewable_survey_ids(user))
+    assigned = SurveyViewer.objects.filter(user_id=user.pk).values('survey_id')
+    return Survey.objects.filter(Q(creator_id=user.pk) | Q(id__in=assigned))
+
+
+def can_view(user, survey):
+    """Si el usuario puede ver la encuesta (estadísticas, exportaciones, respuestas)"""
+    if not user or not user.is_authenticated:
+        return False
+    if user.is_admin() or survey.creator_id == user.pk:
+        return True
+    if cache_enabled():
+        return survey.id in viewable_survey_ids(user)
+    return SurveyViewer.objects.filter(survey_id=survey.id, user_id=user.pk).exists()
+
+
+def invalidate(*user_ids):
+    cache.delete_many([cache_key(user_id) for user_id in user_ids if user_id is not None])
@@ -1,5 +1,34 @@
 from django.contrib import admin
 from .models import Survey, Question, Option, MatrixRow, MatrixColumn, Response, Answer
+from .signals import touch_surveys
+from .tallies import rebuild_survey
+
+
+class RebuildTalliesMixin:
+    """Recalcula los tallies de las encuestas afectadas por cambios hechos en el admin"""
+    # Ruta (estilo lookup) desde el objeto hasta su encuesta
+    survey_path = 'survey'
+
+    def _rebuild(self, survey_ids):
+        for survey in Survey.objects.filter(id__in=survey_ids):
+            rebuild_survey(survey)
+
+    def _survey_ids(self, queryset):
+        return list(queryset.values_list(self.survey_path, flat=True).distinct())
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        self._rebuild(self._survey_ids(self.model.objects.filter(pk=form.instance.pk)))
+
+    def delete_model(self, request, obj):
+        survey_ids = self._survey_ids(self.model.objects.filter(pk=obj.pk))
+        super().delete_model(request, obj)
+        self._rebuild(survey_ids)
+
+    def delete_queryset(self, request, queryset):
+        survey_ids = self._survey_ids(queryset)
+        super().delete_queryset(request, queryset)
+        self._rebuild(survey_ids)
 
 
 class OptionInline(admin.TabularInline):
@@ -33,21 +62,27 @@ class SurveyAdmin(admin.ModelAdmin):
 
 
 @admin.register(Question)
-class QuestionAdmin(admin.ModelAdmin):
+class QuestionAdmin(RebuildTalliesMixin, admin.ModelAdmin):
     list_display = ('text', 'survey', 'question_type', 'is_required', 'order')
     list_filter = ('question_type', 'is_required')
     inlines = [OptionInline, MatrixRowInline, MatrixColumnInline]
 
+    def _rebuild(self, survey_ids):
+        # Los borrados no emiten señales (signals.py): marcar aquí la encuesta
+        touch_surveys(survey_ids)
+        super()._rebuild(survey_ids)
+
 
 @admin.register(Response)
-class ResponseAdmin(admin.ModelAdmin):
+class ResponseAdmin(RebuildTalliesMixin, admin.ModelAdmin):
     list_display = ('survey', 'respondent_name', 'respondent_email', 'submitted_at')
     list_filter = ('submitted_at', 'survey')
     readonly_fields = ('submitted_at',)
 
 
 @admin.register(Answer)
-class AnswerAdmin(admin.ModelAdmin):
+class AnswerAdmin(RebuildTalliesMixin, admin.ModelAdmin):
+    survey_path = 'response__survey'
     list_display = ('response', 'question', 'selected_option', 'matrix_row', 'matrix_column')
     list_filter = ('question',)
 
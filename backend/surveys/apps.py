@@ -5,3 +5,6 @@ class SurveysConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'surveys'
 
+
+    def ready(self):
+        from . import signals  # noqa: F401
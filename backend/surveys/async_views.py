@@ -0,0 +1,110 @@
+"""
+Versiones asíncronas de los endpoints públicos (responder y ver encuesta).
+
+Pensadas para servirse con un servidor ASGI (``uvicorn config.asgi:application``)
+y activarse con ``SURVEY_ASYNC_VIEWS=True``: mientras un cliente lento envía
+o recibe datos no ocupa un hilo del servidor. Las lecturas usan el ORM
+asíncrono de Django; las escrituras, que necesitan ``transaction.atomic``
+(solo síncrono en Django 4.2), se ejecutan con ``sync_to_async``.
+"""
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+
+from .models import Survey
+from . import public_cache
+from .serializers import ResponseSerializer
+from .spool import get_spool, spooling_enabled
+from .submissions import survey_closed_error, save_responses
+from .validation import schema_cache
+
+logger = logging.getLogger(__name__)
+
+
+async def _get_survey(survey_id, queryset=None):
+    queryset = queryset if queryset is not None else Survey.objects.all()
+    try:
+        return await queryset.filter(id=survey_id).afirst()
+    except ValidationError:
+        # id con formato inválido
+        return None
+
+
+async def ResponseCreateAsyncView(request):
+    """Crear respuestas a encuestas (público, asíncrono)"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Método no permitido'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'JSON inválido'}, status=400)
+
+    survey = await _get_survey(data.get('survey'))
+    if survey is None:
+        return JsonResponse({'error': 'Encuesta no encontrada.'}, status=404)
+
+    closed_error = survey_closed_error(survey)
+    if closed_error:
+        return JsonResponse({'error': closed_error}, status=400)
+
+    # Compilar el esquema fuera del event loop solo si no está en caché y
+    # pasarlo al serializer: si otro hilo lo desaloja de la caché entretanto,
+    # la validación sigue sin hacer consultas
+    schema = schema_cache.peek(survey)
+    if schema is None:
+        schema = await sync_to_async(schema_cache.get)(survey)
+
+    serializer = ResponseSerializer(
+        data=data, context={'request': request, 'survey': survey, 'schema': schema}
+    )
+    if not serializer.is_valid():
+        logger.error(f'Errores de validación: {serializer.errors}')
+        return JsonResponse({'error': f'Datos inválidos: {serializer.errors}'}, status=400)
+
+    try:
+        if spooling_enabled():
+            await sync_to_async(get_spool().append, thread_sensitive=False)(
+                data, ip_address=request.META.get('REMOTE_ADDR')
+            )
+            return JsonResponse({'message': 'Respuesta recibida exitosamente.'}, status=202)
+
+        await sync_to_async(save_responses)([serializer.build(serializer.validated_data)])
+    except Exception as e:
+        logger.error(f'Error en ResponseCreateAsyncView: {str(e)}', exc_info=True)
+        return JsonResponse({'error': f'Error al guardar la respuesta: {str(e)}'}, status=400)
+
+    return JsonResponse({'message': 'Respuesta guardada exitosamente.'}, status=201)
+
+
+# csrf_exempt de Django 4.2 no conserva las vistas asíncronas; marcarla a mano
+ResponseCreateAsyncView.csrf_exempt = True
+
+
+async def SurveyPublicAsyncView(request, id):
+    """Ver una encuesta pública (asíncrono)"""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Método no permitido'}, status=405)
+
+    survey = await _get_survey(id)
+    if survey is None:
+        return JsonResponse({'error': 'Encuesta no encontrada.'}, status=404)
+
+    if not survey.is_active:
+        return JsonResponse({'error': 'Esta encuesta no está activa.'}, status=400)
+
+    if not survey.is_open:
+        return JsonResponse(
+            {'error': f'Esta encuesta no está disponible actualmente. Fechas: '
+                      f'{survey.start_date.isoformat()} - {survey.end_date.isoformat()}'},
+            status=400
+        )
+
+    # Con el documento en caché no se toca el ORM síncrono
+    document = await public_cache.aget_cached(survey)
+    if document is None:
+        document = await sync_to_async(public_cache.get_document)(survey)
+    return public_cache.document_response(document, request)
@@ -0,0 +1,26 @@
+"""
+Trabajo de cada proceso del pool de ``export_bundle``.
+
+Los procesos se crean con ``spawn`` (no heredan conexiones ni hilos del
+padre), así que este módulo no importa nada de Django al cargarse: los
+modelos solo se pueden importar después de ``django.setup()``.
+"""
+import os
+import time
+
+
+def init_worker():
+    import django
+    django.setup()
+
+
+def export_survey(survey_id, directory):
+    """Genera el libro de una encuesta; devuelve (ruta, segundos)"""
+    from .excel_export import write_workbook
+    from .models import Survey
+
+    start = time.perf_counter()
+    survey = Survey.objects.get(id=survey_id)
+    path = os.path.join(directory, f'encuesta_{survey_id}.xlsx')
+    write_workbook(survey, path)
+    return path, time.perf_counter() - start
@@ -0,0 +1,72 @@
+"""
+Peticiones condicionales (ETag / Last-Modified) para las lecturas de encuestas.
+
+Los validadores salen de ``updated_at`` de la encuesta (que también cambia al
+editar sus preguntas, ver signals.py), de la última respuesta recibida y del
+número de respuestas, más si la encuesta está abierta: ``is_open`` depende de
+la hora, así que al pasar ``start_date`` o ``end_date`` la versión cambia y
+Last-Modified pasa a ser esa fecha. Calcularlos cuesta dos consultas pequeñas, así que un
+cliente que ya tiene la versión vigente recibe 304 sin que se serialice la
+encuesta ni se agreguen estadísticas.
+"""
+import hashlib
+
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .models import SurveyTally
+
+
+class Validators:
+    __slots__ = ('etag', 'last_modified')
+
+    def __init__(self, etag, last_modified):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def not_modified(self, request):
+        """304 (o 412) si las cabeceras condicionales del cliente se cumplen, o None"""
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=int(self.last_modified.timestamp())
+        )
+        if response is not None:
+            self.apply(response)
+        return response
+
+    def apply(self, response):
+        response['ETag'] = self.etag
+        response['Last-Modified'] = http_date(self.last_modified.timestamp())
+        # Datos con permisos: solo caché del navegador, siempre revalidada
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+def survey_version(survey):
+    """
+    (versión, última modificación) del contenido de la encuesta.
+
+    La versión combina id, ``updated_at``, la última respuesta, el número de
+    respuestas y si está abierta: cambia con cualquier edición, respuesta
+    nueva o apertura/cierre por fechas.
+    """
+    now = timezone.now()
+    latest = survey.responses.aggregate(latest=Max('submitted_at'))['latest']
+    count = SurveyTally.objects.filter(survey=survey).values_list('responses', flat=True).first() or 0
+    state = 'open' if survey.is_active and survey.start_date <= now <= survey.end_date else 'closed'
+    version = (
+        f'{survey.id}:{survey.updated_at.isoformat()}:{latest.isoformat() if latest else "-"}'
+        f':{count}:{state}'
+    )
+    # Las fechas de apertura y cierre ya alcanzadas también modifican la representación
+    passed = [date for date in (survey.start_date, survey.end_date) if date <= now]
+    last_modified = max([survey.updated_at, *passed, *([latest] if latest else [])])
+    return version, last_modified
+
+
+def survey_validators(survey, kind):
+    """Validadores de una vista de la encuesta (``kind`` distingue representaciones)"""
+    version, last_modified = survey_version(survey)
+    etag = quote_etag(hashlib.md5(f'{kind}:{version}'.encode()).hexdigest())
+    return Validators(etag, last_modified)
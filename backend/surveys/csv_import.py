@@ -0,0 +1,216 @@
+"""
+Importación de respuestas desde CSV (p. ej. datos históricos de otra herramienta).
+
+Cada columna se asocia por su cabecera a una pregunta de la encuesta. Se
+admite el formato que genera export_csv (ver raw_export.py), con o sin el
+número de pregunta delante:
+- ``respondent_name``, ``respondent_email``, ``submitted_at``: datos de la
+  respuesta (``response_id`` se ignora).
+- ``Pregunta``: single (texto de la opción), open (texto libre) o multiple
+  (textos de las opciones separados por ``;``).
+- ``Pregunta [Opción]`` (multiple) y ``Pregunta [Fila / Columna]``
+  (matrix_mul): la celda marcada (1, x, sí, true) indica que se eligió.
+- ``Pregunta [Fila]``: matrix (texto de la columna) o matrix_mul (textos de
+  las columnas separados por ``;``).
+
+Los textos se resuelven contra mapas en memoria construidos una vez por
+encuesta, sin distinguir mayúsculas ni espacios sobrantes. Se quita el
+apóstrofo que export_csv añade delante de los textos con aspecto de fórmula.
+"""
+import re
+from collections import defaultdict
+from datetime import datetime
+
+from django.utils import timezone
+
+from .models import Response
+from .raw_export import FORMULA_PREFIXES
+
+IGNORED_COLUMNS = {'response_id'}
+RESPONSE_COLUMNS = {'submitted_at', 'respondent_name', 'respondent_email'}
+CHECKED_VALUES = {'1', 'x', 'si', 'sí', 'true', 'yes'}
+MULTI_SEPARATOR = ';'
+
+numbered_header = re.compile(r'^(\d+)\.\s+(.*)$', re.S)
+
+
+class LayoutError(Exception):
+    """Cabeceras que no se pueden asociar a la encuesta"""
+
+
+class RowError(Exception):
+    """Fila con un valor que no corresponde a la pregunta"""
+
+
+def unescape(value):
+    """Deshace raw_export.csv_safe"""
+    if value.startswith("'") and value[1:].startswith(FORMULA_PREFIXES):
+        return value[1:]
+    return value
+
+
+def normalize(text):
+    return ' '.join(str(text).split()).casefold()
+
+
+def checked(value):
+    return normalize(value) in CHECKED_VALUES
+
+
+class QuestionLookup:
+    """Textos de opciones, filas y columnas de una pregunta -> ids"""
+
+    def __init__(self, question):
+        self.question = question
+        self.options = {normalize(option.text): option.id for option in question.options.all()}
+        self.rows = {normalize(row.text): row.id for row in question.matrix_rows.all()}
+        self.columns = {normalize(column.text): column.id for column in question.matrix_columns.all()}
+
+    def find(self, mapping, text, kind):
+        try:
+            return mapping[normalize(text)]
+        except KeyError:
+            raise RowError(f'"{text}" no es una {kind} de la pregunta "{self.question.text[:50]}"')
+
+    def option(self, text):
+        return self.find(self.options, text, 'opción')
+
+    def column(self, text):
+        return self.find(self.columns, text, 'columna')
+
+
+def split_values(value):
+    return [part.strip() for part in value.split(MULTI_SEPARATOR) if part.strip()]
+
+
+class ImportLayout:
+    """Qué respuestas produce cada columna del CSV"""
+
+    def __init__(self, questions, headers):
+        self.questions = list(questions)
+        self.lookups = {question.id: QuestionLookup(question) for question in self.questions}
+        self.by_text = defaultdict(list)
+        for question in self.questions:
+            self.by_text[normalize(question.text)].append(question)
+
+        self.response_columns = {}
+        self.answer_columns = []
+        unknown = []
+        for index, header in enumerate(headers):
+            header = unescape(header)
+            name = normalize(header)
+            if name in IGNORED_COLUMNS:
+                continue
+            if name in RESPONSE_COLUMNS:
+                self.response_columns[name] = index
+                continue
+            handler = self.column_handler(header)
+            if handler is None:
+                unknown.append(header)
+            else:
+                self.answer_columns.append((index, handler))
+        if unknown:
+            raise LayoutError(
+                'Columnas que no corresponden a ninguna pregunta: '
+                + ', '.join(f'"{header}"' for header in unknown)
+            )
+
+    def find_question(self, text, number=None):
+        """Pregunta por texto; el número de la cabecera desempata textos repetidos"""
+        candidates = self.by_text.get(normalize(text), [])
+        if number is not None and 0 < number <= len(self.questions):
+            question = self.questions[number - 1]
+            if question in candidates:
+                return question
+        return candidates[0] if len(candidates) == 1 else None
+
+    def column_handler(self, header):
+        number, text = None, header.strip()
+        match = numbered_header.match(text)
+        if match:
+            number, text = int(match.group(1)), match.group(2)
+
+        question = self.find_question(text, number)
+        if question is not None:
+            return self.question_column(question)
+
+        # "Pregunta [elemento]": probar cada corchete desde la derecha, por si
+        # el texto de la pregunta también los tiene
+        if text.endswith(']'):
+            start = text.rfind('[')
+            while start > 0:
+                question = self.find_question(text[:start], number)
+                if question is not None:
+                    return self.item_column(question, text[start + 1:-1])
+                start = text.rfind('[', 0, start)
+        return None
+
+    def question_column(self, question):
+        lookup = self.lookups[question.id]
+        if question.question_type == 'open':
+            return lambda value: [{'question': question.id, 'text_answer': value}]
+        if question.question_type == 'single':
+            return lambda value: [{'question': question.id, 'selected_option': lookup.option(value)}]
+        if question.question_type == 'multiple':
+            return lambda value: [
+                {'question': question.id, 'selected_option': lookup.option(text)}
+                for text in split_values(value)
+            ]
+        return None
+
+    def item_column(self, question, item):
+        lookup = self.lookups[question.id]
+        name = normalize(item)
+        if question.question_type == 'multiple' and name in lookup.options:
+            answer = {'question': question.id, 'selected_option': lookup.options[name]}
+            return lambda value: [answer] if checked(value) else []
+        if question.question_type in ['matrix', 'matrix_mul'] and name in lookup.rows:
+            row = lookup.rows[name]
+            if question.question_type == 'matrix':
+                return lambda value: [
+                    {'question': question.id, 'matrix_row': row, 'matrix_column': lookup.column(value)}
+                ]
+            return lambda value: [
+                {'question': question.id, 'matrix_row': row, 'matrix_column': lookup.column(text)}
+                for text in split_values(value)
+            ]
+        if question.question_type == 'matrix_mul' and '/' in item:
+            row_text, column_text = item.rsplit('/', 1)
+            row = lookup.rows.get(normalize(row_text))
+            column = lookup.columns.get(normalize(column_text))
+            if row is not None and column is not None:
+                answer = {'question': question.id, 'matrix_row': row, 'matrix_column': column}
+                return lambda value: [answer] if checked(value) else []
+        return None
+
+    def parse(self, survey, row):
+        """(Response sin guardar, lista de answers) de una fila del CSV"""
+        def cell(index):
+            return unescape(row[index]).strip() if index < len(row) else ''
+
+        answers = []
+        for index, handler in self.answer_columns:
+            value = cell(index)
+            if value:
+                answers.extend(handler(value))
+
+        fields = {name: cell(index) for name, index in self.response_columns.items()}
+        response = Response(
+            survey=survey,
+            respondent_name=fields.get('respondent_name', ''),
+            respondent_email=fields.get('respondent_email', ''),
+            submitted_at=parse_submitted_at(fields.get('submitted_at')),
+        )
+        return response, answers
+
+
+def parse_submitted_at(value):
+    if not value:
+        return timezone.now()
+    try:
+        submitted_at = datetime.fromisoformat(value)
+    except ValueError:
+        raise RowError(f'Fecha inválida: "{value}"')
+    if timezone.is_naive(submitted_at):
+        submitted_at = timezone.make_aware(submitted_at)
+    return submitted_at
@@ -0,0 +1,207 @@
+"""
+Exportación de estadísticas a Excel con memoria constante.
+
+Usa el modo de solo escritura de openpyxl: cada fila se escribe al archivo en
+cuanto se añade, así que el proceso no guarda el libro completo en memoria.
+Los conteos salen de los tallies (una pasada ya agregada) y las respuestas
+abiertas se recorren con ``.iterator()``, que en PostgreSQL usa un cursor del
+lado del servidor. El resultado es el mismo libro que antes: una hoja por
+pregunta, con tablas y gráficas.
+"""
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.chart import PieChart, BarChart, Reference
+from openpyxl.styles import Font, Alignment, PatternFill
+
+from .models import Answer
+from .statistics import get_questions, option_counts, matrix_counts
+from .tallies import load_counts
+
+OPEN_ANSWERS_CHUNK_SIZE = 2000
+
+HEADER_FILL = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+TITLE_FONT = Font(bold=True, size=16)
+QUESTION_FONT = Font(bold=True, size=14)
+SUBTITLE_FONT = Font(bold=True, size=12)
+CENTER = Alignment(horizontal='center', vertical='center')
+COLUMN_WIDTHS = {'A': 35, 'B': 15, 'C': 15, 'D': 2, 'E': 2, 'F': 2}
+
+
+class SheetWriter:
+    """Escribe filas en orden sobre una hoja de solo escritura"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.row = 1
+
+    def cell(self, value, font=None, fill=None, alignment=None):
+        cell = WriteOnlyCell(self.ws, value=value)
+        if font:
+            cell.font = font
+        if fill:
+            cell.fill = fill
+        if alignment:
+            cell.alignment = alignment
+        return cell
+
+    def header(self, value):
+        return self.cell(value, font=HEADER_FONT, fill=HEADER_FILL, alignment=CENTER)
+
+    def write(self, row, cells=(), merge=False):
+        """Escribe la fila ``row`` (las anteriores vacías se rellenan)"""
+        while self.row < row:
+            self.ws.append([])
+            self.row += 1
+        self.ws.append(list(cells))
+        if merge:
+            self.ws.merged_cells.add(f'A{row}:F{row}')
+        self.row += 1
+
+
+def new_sheet(wb, title):
+    ws = wb.create_sheet(title=title)
+    # Anchos y paneles deben fijarse antes de escribir la primera fila
+    for column, width in COLUMN_WIDTHS.items():
+        ws.column_dimensions[column].width = width
+    ws.freeze_panes = 'A4'
+    return ws
+
+
+def write_choice_table(sheet, question, question_num, counts, row):
+    sheet.write(row, [sheet.header("Opción"), sheet.header("Cantidad"), sheet.header("Porcentaje")])
+    row += 1
+
+    # Solo opciones elegidas, de mayor a menor
+    answers = sorted(
+        [(option, count) for option, count in option_counts(question, counts) if count],
+        key=lambda item: -item[1]
+    )
+    # Total de respuestas (distintas por respuesta para multiple)
+    if question.question_type == 'single':
+        total = sum(count for _, count in answers)
+    else:
+        total = counts.respondents.get(question.id, 0)
+
+    data_start_row = row
+    for option, count in answers:
+        percentage = (count / total * 100) if total > 0 else 0
+        sheet.write(row, [
+            sheet.cell(option.text, alignment=Alignment(horizontal='left')),
+            sheet.cell(count, alignment=Alignment(horizontal='center')),
+            sheet.cell(f"{percentage:.1f}%", alignment=Alignment(horizontal='center')),
+        ])
+        row += 1
+    data_end_row = row - 1
+    row += 2
+
+    # Gráficas (igual que en la web: pastel y barras)
+    if total > 0 and data_end_row >= data_start_row:
+        ws = sheet.ws
+        data_ref = Reference(ws, min_col=2, min_row=data_start_row, max_row=data_end_row)
+        cats_ref = Reference(ws, min_col=1, min_row=data_start_row, max_row=data_end_row)
+
+        pie_chart = PieChart()
+        pie_chart.title = f"Pregunta {question_num}"
+        pie_chart.add_data(data_ref, titles_from_data=False)
+        pie_chart.set_categories(cats_ref)
+        pie_chart.width = 14
+        pie_chart.height = 8
+        pie_chart.legend.position = 'r'
+        ws.add_chart(pie_chart, f'E{row}')
+
+        bar_chart = BarChart()
+        bar_chart.type = "col"
+        bar_chart.style = 10
+        bar_chart.title = f"Pregunta {question_num}"
+        bar_chart.y_axis.title = 'Cantidad'
+        bar_chart.x_axis.title = 'Opción'
+        bar_chart.add_data(data_ref, titles_from_data=False)
+        bar_chart.set_categories(cats_ref)
+        bar_chart.width = 14
+        bar_chart.height = 8
+        bar_chart.legend.position = 'r'
+        ws.add_chart(bar_chart, f'E{row + 18}')
+
+
+def write_matrix_table(sheet, question, question_num, counts, row):
+    columns = list(question.matrix_columns.all())
+    sheet.write(row, [sheet.header("Fila / Columna")] + [sheet.header(column.text) for column in columns])
+    row += 1
+
+    data_start_row = row
+    for matrix_row, cells in matrix_counts(question, counts):
+        sheet.write(row, [sheet.cell(matrix_row.text, alignment=Alignment(horizontal='left'))] + [
+            sheet.cell(count, alignment=Alignment(horizontal='center')) for _, count in cells
+        ])
+        row += 1
+    data_end_row = row - 1
+    row += 2
+
+    # Gráfica de barras agrupadas (igual que en la web)
+    if data_end_row >= data_start_row and columns:
+        ws = sheet.ws
+        bar_chart = BarChart()
+        bar_chart.type = "col"
+        bar_chart.style = 10
+        bar_chart.title = f"Pregunta {question_num}"
+        bar_chart.y_axis.title = 'Cantidad'
+        bar_chart.x_axis.title = 'Opciones'
+        # Referencia de datos: incluir encabezados de columnas
+        data_ref = Reference(ws, min_col=2, min_row=data_start_row - 1,
+                             max_col=len(columns) + 1, max_row=data_end_row)
+        cats_ref = Reference(ws, min_col=1, min_row=data_start_row, max_row=data_end_row)
+        bar_chart.add_data(data_ref, titles_from_data=True)
+        bar_chart.set_categories(cats_ref)
+        bar_chart.width = 14
+        bar_chart.height = 8
+        bar_chart.legend.position = 'b'
+        ws.add_chart(bar_chart, f'E{row + 18}')
+
+
+def write_open_answers(sheet, question, row):
+    sheet.write(row, [sheet.cell("Respuestas abiertas", font=SUBTITLE_FONT)], merge=True)
+    row += 2
+    sheet.write(row, [
+        sheet.cell("N°", font=HEADER_FONT, fill=HEADER_FILL),
+        sheet.cell("Respuesta", font=HEADER_FONT, fill=HEADER_FILL),
+    ])
+
+    texts = (
+        Answer.objects.filter(question=question)
+        .exclude(text_answer__isnull=True).exclude(text_answer__exact='')
+        .order_by('id')
+        .values_list('text_answer', flat=True)
+        .iterator(chunk_size=OPEN_ANSWERS_CHUNK_SIZE)
+    )
+    for idx, text in enumerate(texts, start=1):
+        sheet.write(sheet.row, [idx, sheet.cell(text, alignment=Alignment(wrap_text=True))])
+
+
+def write_workbook(survey, file, progress=None):
+    """
+    Escribe el libro de estadísticas de la encuesta en ``file`` (ruta o archivo).
+
+    ``progress(hechas, total)`` se llama tras escribir cada pregunta.
+    """
+    counts = load_counts(survey)
+    questions = get_questions(survey)
+    wb = Workbook(write_only=True)
+
+    for question_num, question in enumerate(questions, start=1):
+        sheet = SheetWriter(new_sheet(wb, f"Pregunta {question_num}"))
+        sheet.write(1, [sheet.cell(f"Encuesta: {survey.title}", font=TITLE_FONT)], merge=True)
+        sheet.write(2, [sheet.cell(f"Total de respuestas: {counts.responses}", font=SUBTITLE_FONT)], merge=True)
+        sheet.write(4, [sheet.cell(f"Pregunta {question_num}: {question.text}", font=QUESTION_FONT)], merge=True)
+
+        if question.question_type in ['single', 'multiple']:
+            write_choice_table(sheet, question, question_num, counts, 6)
+        elif question.question_type in ['matrix', 'matrix_mul']:
+            write_matrix_table(sheet, question, question_num, counts, 6)
+        elif question.question_type == 'open':
+            write_open_answers(sheet, question, 6)
+
+        if progress:
+            progress(question_num, len(questions))
+
+    wb.save(file)
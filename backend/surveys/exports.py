@@ -0,0 +1,161 @@
+"""
+Exportaciones a Excel en segundo plano.
+
+``start_export`` registra un ExportJob y lo encola; un worker genera el libro
+(ver excel_export.py) fuera del ciclo petición/respuesta e informa el
+progreso por pregunta. Con ``SURVEY_EXPORT_WORKER = 'thread'`` lo hace un
+pool de hilos del propio proceso web; con ``'command'`` el comando
+``run_export_jobs``.
+
+Los archivos terminados se guardan en ``SURVEY_EXPORT_DIR`` con un nombre
+derivado de la encuesta y de su última respuesta (``artifact_key``): mientras
+no llegue ninguna respuesta nueva, las siguientes exportaciones reutilizan el
+mismo archivo sin regenerarlo.
+
+Un trabajo que lleva más de ``SURVEY_EXPORT_TIMEOUT`` segundos pendiente o en
+curso se da por perdido (reinicio del proceso web, worker terminado):
+``start_export`` lo marca como fallido y encola uno nuevo, y
+``run_export_jobs`` devuelve a pendientes los que quedaron en curso.
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .conditional import survey_version
+from .excel_export import write_workbook
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def artifact_key(survey):
+    """Hash de la versión de la encuesta (edición, última respuesta, número de respuestas)"""
+    version, _ = survey_version(survey)
+    return hashlib.sha1(version.encode()).hexdigest()
+
+
+def artifact_path(survey_id, key):
+    return Path(settings.SURVEY_EXPORT_DIR) / str(survey_id) / f'{key}.xlsx'
+
+
+def job_path(job):
+    return artifact_path(job.survey_id, job.artifact_key)
+
+
+def stale_jobs(queryset):
+    """Trabajos pendientes o en curso desde hace más de SURVEY_EXPORT_TIMEOUT"""
+    limit = timezone.now() - timedelta(seconds=settings.SURVEY_EXPORT_TIMEOUT)
+    return queryset.filter(
+        Q(status='pending', created_at__lt=limit) | Q(status='running', started_at__lt=limit)
+    )
+
+
+def requeue_stale_jobs():
+    """Devuelve a pendientes los trabajos en curso abandonados; devuelve cuántos"""
+    return stale_jobs(ExportJob.objects.filter(status='running')).update(
+        status='pending', progress=0, started_at=None
+    )
+
+
+def start_export(survey, user):
+    """
+    Devuelve un ExportJob para el contenido actual de la encuesta.
+
+    Reutiliza un trabajo en curso o un archivo ya generado con la misma clave;
+    si no hay ninguno crea uno pendiente y lo encola. Los trabajos vencidos
+    se marcan como fallidos y no se reutilizan.
+    """
+    key = artifact_key(survey)
+    stale_jobs(ExportJob.objects.filter(survey=survey)).update(
+        status='failed', error='Tiempo de espera agotado', finished_at=timezone.now()
+    )
+    job = ExportJob.objects.filter(
+        survey=survey, artifact_key=key, status__in=['pending', 'running', 'done']
+    ).first()
+    if job and (job.status != 'done' or job_path(job).exists()):
+        return job
+
+    if artifact_path(survey.id, key).exists():
+        now = timezone.now()
+        return ExportJob.objects.create(
+            survey=survey, requested_by=user, artifact_key=key,
+            status='done', progress=100, started_at=now, finished_at=now
+        )
+
+    job = ExportJob.objects.create(survey=survey, requested_by=user, artifact_key=key)
+    if settings.SURVEY_EXPORT_WORKER == 'thread':
+        job_id = job.id
+        transaction.on_commit(lambda: submit(job_id))
+    return job
+
+
+def submit(job_id):
+    """Ejecuta el trabajo en el pool de hilos del proceso"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.SURVEY_EXPORT_THREADS, thread_name_prefix='survey-export'
+        )
+    _executor.submit(_run_in_thread, job_id)
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        # Cada hilo abre su propia conexión; cerrarla al terminar
+        connection.close()
+
+
+def run_job(job_id):
+    """Genera el archivo de un trabajo pendiente; devuelve False si otro worker lo tomó"""
+    claimed = ExportJob.objects.filter(id=job_id, status='pending').update(
+        status='running', started_at=timezone.now()
+    )
+    if not claimed:
+        return False
+
+    job = ExportJob.objects.select_related('survey').get(id=job_id)
+    path = job_path(job)
+    tmp_path = path.with_name(f'{path.stem}.{job.id}.tmp')
+    last_progress = [0]
+
+    def progress(done, total):
+        percent = int(done * 100 / total) if total else 100
+        if percent != last_progress[0]:
+            last_progress[0] = percent
+            ExportJob.objects.filter(id=job.id).update(progress=percent)
+
+    try:
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_workbook(job.survey, tmp_path, progress=progress)
+            os.replace(tmp_path, path)
+            remove_stale_artifacts(path)
+        ExportJob.objects.filter(id=job.id).update(
+            status='done', progress=100, finished_at=timezone.now()
+        )
+    except Exception as e:
+        logger.error(f'Error en la exportación {job.id}: {str(e)}', exc_info=True)
+        tmp_path.unlink(missing_ok=True)
+        ExportJob.objects.filter(id=job.id).update(
+            status='failed', error=str(e), finished_at=timezone.now()
+        )
+    return True
+
+
+def remove_stale_artifacts(path):
+    """Borra los archivos anteriores de la misma encuesta"""
+    for other in path.parent.glob('*.xlsx'):
+        if other != path:
+            other.unlink(missing_ok=True)
@@ -0,0 +1,135 @@
+"""
+Utilidades compartidas por los comandos de benchmark.
+
+Generan encuestas y respuestas sintéticas con inserciones masivas. Los
+comandos que las usan trabajan dentro de una transacción que se revierte al
+final, así que no dejan datos en la base.
+"""
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+
+from accounts.models import User
+from surveys.models import (
+    Survey, Question, Option, MatrixRow, MatrixColumn, Response, Answer
+)
+from surveys.statistics import get_questions
+from surveys.tallies import rebuild_survey
+
+QUESTION_TYPES = ['single', 'multiple', 'matrix', 'matrix_mul', 'open']
+
+
+def get_bench_user():
+    user, _ = User.objects.get_or_create(
+        username='benchmark', defaults={'role': 'admin'}
+    )
+    return user
+
+
+def build_survey(n_questions, creator=None, options=4, rows=3, columns=5):
+    """Crea una encuesta con n preguntas repartidas entre todos los tipos"""
+    now = timezone.now()
+    survey = Survey.objects.create(
+        title=f'Benchmark {n_questions} preguntas',
+        creator=creator or get_bench_user(),
+        start_date=now - timedelta(days=1),
+        end_date=now + timedelta(days=30),
+    )
+    questions = Question.objects.bulk_create([
+        Question(
+            survey=survey,
+            text=f'Pregunta {i + 1}',
+            question_type=QUESTION_TYPES[i % len(QUESTION_TYPES)],
+            order=i,
+        )
+        for i in range(n_questions)
+    ])
+
+    option_objs, row_objs, column_objs = [], [], []
+    for question in questions:
+        if question.question_type in ['single', 'multiple']:
+            option_objs += [
+                Option(question=question, text=f'Opción {j + 1}', order=j)
+                for j in range(options)
+            ]
+        elif question.question_type in ['matrix', 'matrix_mul']:
+            row_objs += [
+                MatrixRow(question=question, text=f'Fila {j + 1}', order=j)
+                for j in range(rows)
+            ]
+            column_objs += [
+                MatrixColumn(question=question, text=f'Columna {j + 1}', order=j)
+                for j in range(columns)
+            ]
+    Option.objects.bulk_create(option_objs, batch_size=5000)
+    MatrixRow.objects.bulk_create(row_objs, batch_size=5000)
+    MatrixColumn.objects.bulk_create(column_objs, batch_size=5000)
+    return survey
+
+
+def random_answers(questions, rng):
+    """Lista de dicts de respuesta (formato del endpoint público)"""
+    answers = []
+    for question in questions:
+        options = list(question.options.all())
+        rows = list(question.matrix_rows.all())
+        columns = list(question.matrix_columns.all())
+        if question.question_type == 'single':
+            answers.append({'question': question.id, 'selected_option': rng.choice(options).id})
+        elif question.question_type == 'multiple':
+            for option in rng.sample(options, rng.randint(1, len(options))):
+                answers.append({'question': question.id, 'selected_option': option.id})
+        elif question.question_type == 'matrix':
+            for row in rows:
+                answers.append({
+                    'question': question.id,
+                    'matrix_row': row.id,
+                    'matrix_column': rng.choice(columns).id,
+                })
+        elif question.question_type == 'matrix_mul':
+            for row in rows:
+                for column in rng.sample(columns, rng.randint(1, 2)):
+                    answers.append({
+                        'question': question.id,
+                        'matrix_row': row.id,
+                        'matrix_column': column.id,
+                    })
+        elif question.question_type == 'open':
+            answers.append({'question': question.id, 'text_answer': f'Comentario {rng.random():.6f}'})
+    return answers
+
+
+def fill_responses(survey, n_responses, seed=0):
+    """Inserta n respuestas aleatorias directamente (sin pasar por la API) y recalcula los tallies"""
+    rng = random.Random(seed)
+    questions = get_questions(survey)
+    responses = Response.objects.bulk_create(
+        [Response(survey=survey) for _ in range(n_responses)], batch_size=5000
+    )
+    answers = []
+    for response in responses:
+        for data in random_answers(questions, rng):
+            answers.append(Answer(
+                response=response,
+                question_id=data['question'],
+                selected_option_id=data.get('selected_option'),
+                matrix_row_id=data.get('matrix_row'),
+                matrix_column_id=data.get('matrix_column'),
+                text_answer=data.get('text_answer', ''),
+            ))
+    Answer.objects.bulk_create(answers, batch_size=5000)
+    rebuild_survey(survey)
+    return len(answers)
+
+
+def timed(fn, repeat=5):
+    """Ejecuta fn varias veces y devuelve (mediana, mínimo) en milisegundos"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from config.middleware import brotli, compress
+from config.renderers import FastJSONRenderer, orjson
+from surveys.models import Survey
+from surveys.queries import survey_detail_queryset
+from surveys.serializers import SurveySerializer
+from surveys.statistics import survey_statistics
+from ._bench import build_survey, fill_responses, timed
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el tiempo de serialización de JSONRenderer (DRF) y '
+        'FastJSONRenderer (orjson) y el tamaño de la respuesta sin comprimir, '
+        'con gzip y con brotli. Los datos se crean en una transacción que se '
+        'revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[50, 500],
+                            help='Número de preguntas de cada encuesta sintética')
+        parser.add_argument('--responses', type=int, default=50,
+                            help='Respuestas generadas por encuesta')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Repeticiones por medición (se informa la mediana)')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write('orjson no está instalado: FastJSONRenderer usa el JSON estándar')
+        self.stdout.write(
+            f"{'preguntas':>10} {'payload':>12} {'drf ms':>8} {'orjson ms':>10} "
+            f"{'bytes':>10} {'gzip':>9} {'brotli':>9}"
+        )
+        with transaction.atomic():
+            for size in options['sizes']:
+                survey = build_survey(size)
+                fill_responses(survey, options['responses'])
+                detail = survey_detail_queryset(Survey.objects.filter(id=survey.id)).get()
+                payloads = [
+                    ('detalle', SurveySerializer(detail).data),
+                    ('estadísticas', survey_statistics(survey)),
+                ]
+                for label, data in payloads:
+                    self.report(size, label, data, options['repeat'])
+            transaction.set_rollback(True)
+
+    def report(self, size, label, data, repeat):
+        drf, fast = JSONRenderer(), FastJSONRenderer()
+        body = fast.render(data)
+        if body != drf.render(data):
+            self.stderr.write(f'{label}: la salida de los renderers difiere')
+
+        drf_ms, _ = timed(lambda: drf.render(data), repeat)
+        fast_ms, _ = timed(lambda: fast.render(data), repeat)
+        gzip_size = len(compress(body, 'gzip'))
+        brotli_size = len(compress(body, 'br')) if brotli is not None else '-'
+        self.stdout.write(
+            f'{size:>10} {label:>12} {drf_ms:>8.2f} {fast_ms:>10.2f} '
+            f'{len(body):>10} {gzip_size:>9} {brotli_size:>9}'
+        )
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+
+from surveys.models import Answer
+from surveys.statistics import survey_statistics
+from ._bench import build_survey, fill_responses, timed
+
+
+def per_question_statistics(survey):
+    """Patrón anterior: una a tres consultas de agregación por pregunta"""
+    stats = {'total_responses': survey.total_responses, 'questions': []}
+    for question in survey.questions.all():
+        answers = Answer.objects.filter(question=question)
+        if question.question_type in ['single', 'multiple']:
+            data = dict(
+                answers.filter(selected_option__isnull=False)
+                .values_list('selected_option__text')
+                .annotate(count=Count('id'))
+            )
+            total = answers.values('response').distinct().count()
+        elif question.question_type in ['matrix', 'matrix_mul']:
+            data = list(
+                answers.filter(matrix_row__isnull=False, matrix_column__isnull=False)
+                .values('matrix_row__text', 'matrix_column__text')
+                .annotate(count=Count('id'))
+            )
+            total = answers.values('response').distinct().count()
+        else:
+            total = answers.exclude(text_answer='').count()
+            data = {'Respuestas abiertas': total}
+        stats['questions'].append({'data': data, 'total_answers': total})
+    return stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide consultas y latencia del cálculo de estadísticas para encuestas '
+        'sintéticas de distintos tamaños. Los datos se crean en una transacción '
+        'que se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000],
+                            help='Número de preguntas de cada encuesta sintética')
+        parser.add_argument('--responses', type=int, default=50,
+                            help='Respuestas generadas por encuesta')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Repeticiones por medición (se informa la mediana)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'preguntas':>10} {'answers':>9} {'método':>14} "
+            f"{'consultas':>10} {'mediana ms':>11} {'mín ms':>9}"
+        )
+        with transaction.atomic():
+            for size in options['sizes']:
+                survey = build_survey(size)
+                n_answers = fill_responses(survey, options['responses'])
+                for label, fn in [
+                    ('por pregunta', per_question_statistics),
+                    ('tallies', survey_statistics),
+                ]:
+                    with CaptureQueriesContext(connection) as ctx:
+                        fn(survey)
+                    median, best = timed(lambda: fn(survey), options['repeat'])
+                    self.stdout.write(
+                        f'{size:>10} {n_answers:>9} {label:>14} '
+                        f'{len(ctx.captured_queries):>10} {median:>11.1f} {best:>9.1f}'
+                    )
+            transaction.set_rollback(True)
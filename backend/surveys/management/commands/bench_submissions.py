@@ -0,0 +1,106 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from surveys.models import Answer, Response
+from surveys.serializers import ResponseSerializer
+from surveys.statistics import get_questions
+from surveys import tallies
+from ._bench import build_survey, random_answers
+
+
+class PerAnswerResponseSerializer(ResponseSerializer):
+    """Patrón anterior: un INSERT por answer, sin transacción"""
+
+    def create(self, validated_data):
+        answers_data = validated_data.pop('answers')
+        response = Response.objects.create(**validated_data)
+        answers = [
+            Answer.objects.create(
+                response=response,
+                question_id=answer_data['question'],
+                selected_option_id=answer_data.get('selected_option'),
+                matrix_row_id=answer_data.get('matrix_row'),
+                matrix_column_id=answer_data.get('matrix_column'),
+                text_answer=answer_data.get('text_answer') or ''
+            )
+            for answer_data in answers_data
+        ]
+        tallies.record([response], answers)
+        return response
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide respuestas guardadas por segundo con varios hilos concurrentes, '
+        'comparando el guardado answer por answer con el bulk_create actual. '
+        'Crea una encuesta sintética y la elimina al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=40,
+                            help='Preguntas de la encuesta sintética')
+        parser.add_argument('--submissions', type=int, default=200,
+                            help='Respuestas enviadas por cada modo')
+        parser.add_argument('--threads', type=int, nargs='+', default=[1, 8],
+                            help='Niveles de concurrencia a medir')
+
+    def handle(self, *args, **options):
+        survey = build_survey(options['questions'])
+        try:
+            questions = get_questions(survey)
+            rng = random.Random(0)
+            payloads = [
+                {'survey': str(survey.id), 'answers': random_answers(questions, rng)}
+                for _ in range(options['submissions'])
+            ]
+            per_submission = sum(len(p['answers']) for p in payloads) / len(payloads)
+            self.stdout.write(
+                f'{options["questions"]} preguntas, {per_submission:.0f} answers por respuesta'
+            )
+            self.stdout.write(f"{'modo':>12} {'hilos':>6} {'resp/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+            for threads in options['threads']:
+                for label, serializer_class in [
+                    ('por answer', PerAnswerResponseSerializer),
+                    ('bulk', ResponseSerializer),
+                ]:
+                    self._run(label, serializer_class, payloads, threads)
+        finally:
+            survey.delete()
+
+    def _run(self, label, serializer_class, payloads, threads):
+        latencies = []
+        lock = threading.Lock()
+
+        def submit(payload):
+            start = time.perf_counter()
+            serializer = serializer_class(data=payload)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+
+        def worker(chunk):
+            try:
+                for payload in chunk:
+                    submit(payload)
+            finally:
+                connection.close()
+
+        chunks = [payloads[i::threads] for i in range(threads)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(worker, chunks))
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f'{label:>12} {threads:>6} {len(payloads) / elapsed:>9.1f} {p50:>8.1f} {p99:>8.1f}'
+        )
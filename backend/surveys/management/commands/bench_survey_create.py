@@ -0,0 +1,100 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from surveys.models import Survey, Question, Option, MatrixRow, MatrixColumn
+from surveys.serializers import SurveySerializer
+from ._bench import QUESTION_TYPES, get_bench_user
+
+
+def survey_payload(n_questions, options=4, rows=3, columns=5):
+    """Payload de creación (como el que envía el frontend) con n preguntas"""
+    now = timezone.now()
+    questions = []
+    for i in range(n_questions):
+        question_type = QUESTION_TYPES[i % len(QUESTION_TYPES)]
+        question = {
+            'text': f'Pregunta {i + 1}', 'question_type': question_type,
+            'is_required': True, 'order': i,
+        }
+        if question_type in ['single', 'multiple']:
+            question['options'] = [{'text': f'Opción {j + 1}', 'order': j} for j in range(options)]
+        elif question_type in ['matrix', 'matrix_mul']:
+            question['matrix_rows'] = [{'text': f'Fila {j + 1}', 'order': j} for j in range(rows)]
+            question['matrix_columns'] = [{'text': f'Columna {j + 1}', 'order': j} for j in range(columns)]
+        questions.append(question)
+    return {
+        'title': f'Benchmark {n_questions} preguntas',
+        'start_date': (now - timedelta(days=1)).isoformat(),
+        'end_date': (now + timedelta(days=30)).isoformat(),
+        'questions': questions,
+    }
+
+
+def create_question(survey, question_data):
+    """Pregunta con sus opciones, filas y columnas, un INSERT por objeto"""
+    question_data = dict(question_data)
+    options_data = question_data.pop('options', [])
+    rows_data = question_data.pop('matrix_rows', [])
+    columns_data = question_data.pop('matrix_columns', [])
+    question_data.pop('id', None)
+
+    question = Question.objects.create(survey=survey, **question_data)
+    for model, items in [(Option, options_data), (MatrixRow, rows_data), (MatrixColumn, columns_data)]:
+        for idx, item in enumerate(items):
+            item = dict(item)
+            item.pop('id', None)
+            item['order'] = item.get('order', idx)
+            model.objects.create(question=question, **item)
+    return question
+
+
+def create_per_question(validated_data, context):
+    """Patrón anterior: un INSERT por pregunta, opción, fila y columna"""
+    questions_data = validated_data.pop('questions', [])
+    validated_data.pop('assigned_viewers', None)
+    survey = Survey.objects.create(creator=context['request'].user, **validated_data)
+    for question_data in questions_data:
+        create_question(survey, question_data)
+    return survey
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara la creación de una encuesta pregunta a pregunta con la creación '
+        'masiva (bulk_create) de SurveySerializer. Los datos se crean en una '
+        'transacción que se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[500],
+                            help='Número de preguntas de cada encuesta generada')
+
+    def handle(self, *args, **options):
+        request = APIRequestFactory().post('/api/surveys/')
+        request.user = get_bench_user()
+        context = {'request': request}
+
+        self.stdout.write(f"{'preguntas':>10} {'método':>14} {'sentencias':>11} {'ms':>9}")
+        with transaction.atomic():
+            for size in options['sizes']:
+                payload = survey_payload(size)
+                for label, create in [
+                    ('por pregunta', create_per_question),
+                    ('bulk', lambda data, context: SurveySerializer(context=context).create(data)),
+                ]:
+                    serializer = SurveySerializer(data=payload, context=context)
+                    serializer.is_valid(raise_exception=True)
+                    start = time.perf_counter()
+                    with CaptureQueriesContext(connection) as ctx:
+                        create(serializer.validated_data, context)
+                    elapsed = (time.perf_counter() - start) * 1000
+                    self.stdout.write(
+                        f'{size:>10} {label:>14} {len(ctx.captured_queries):>11} {elapsed:>9.1f}'
+                    )
+            transaction.set_rollback(True)
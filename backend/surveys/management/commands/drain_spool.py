@@ -0,0 +1,139 @@
+import json
+import logging
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from surveys.models import IngestCheckpoint, Survey
+from surveys.serializers import ResponseSerializer, survey_key
+from surveys.spool import get_spool
+from surveys.submissions import save_responses
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Guarda en la base las respuestas acumuladas en el spool de ingesta '
+        '(SURVEY_INGEST_MODE=spool), por bloques y con inserciones masivas. '
+        'La posición se confirma junto con cada bloque, así que se puede '
+        'interrumpir y relanzar en cualquier momento.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Registros por transacción')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Segundos de espera cuando el spool está vacío')
+        parser.add_argument('--once', action='store_true',
+                            help='Vaciar el spool y terminar')
+        parser.add_argument('--stats', action='store_true',
+                            help='Mostrar el retraso (lag) del spool y terminar')
+
+    def handle(self, *args, **options):
+        self.spool = get_spool()
+        if options['stats']:
+            return self.print_stats()
+
+        while True:
+            if self.drain_batch(options['batch_size']):
+                continue
+            self.compact()
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+    def checkpoint(self):
+        checkpoint, _ = IngestCheckpoint.objects.select_for_update().get_or_create(
+            name=self.spool.name
+        )
+        if checkpoint.offset > self.spool.size():
+            # El archivo se truncó pero el checkpoint no llegó a confirmarse
+            logger.warning(f'Checkpoint {checkpoint.offset} mayor que el spool; se reinicia a 0')
+            checkpoint.offset = 0
+        return checkpoint
+
+    def drain_batch(self, batch_size):
+        """Procesa un bloque; devuelve False si no había nada pendiente"""
+        with transaction.atomic():
+            checkpoint = self.checkpoint()
+            records, end_offset = self.spool.read(checkpoint.offset, batch_size)
+            if end_offset == checkpoint.offset:
+                return False
+
+            pending, rejected = self.validate(records)
+            if pending:
+                save_responses(pending)
+            if rejected:
+                # Solo si el bloque se confirma: un rollback o reintento no los duplica
+                transaction.on_commit(lambda: self.reject(rejected))
+
+            checkpoint.offset = end_offset
+            checkpoint.save(update_fields=['offset', 'updated_at'])
+
+        # En bytes: contar registros releería el resto del archivo en cada bloque
+        lag = max(self.spool.size() - end_offset, 0)
+        self.stdout.write(
+            f'{len(pending)} respuestas guardadas, {len(rejected)} rechazadas, '
+            f'{lag} bytes pendientes'
+        )
+        return True
+
+    def validate(self, records):
+        """Revalida cada envío (la encuesta pudo cambiar desde que se recibió)"""
+        survey_ids = {
+            survey_key(record['payload'].get('survey'))
+            for record in records if record and isinstance(record.get('payload'), dict)
+        } - {None}
+        surveys = {survey_key(s.id): s for s in Survey.objects.filter(id__in=survey_ids)}
+        context = {'surveys': surveys}
+
+        pending, rejected = [], []
+        for record in records:
+            if not record or not isinstance(record.get('payload'), dict):
+                rejected.append((record, 'Registro ilegible'))
+                continue
+            serializer = ResponseSerializer(data=record['payload'], context=context)
+            if not serializer.is_valid():
+                rejected.append((record, serializer.errors))
+                continue
+            response, answers_data = serializer.build(serializer.validated_data)
+            response.ip_address = record.get('ip_address')
+            response.submitted_at = datetime.fromisoformat(record['received_at'])
+            pending.append((response, answers_data))
+        return pending, rejected
+
+    def reject(self, rejected):
+        """Guarda los envíos que ya no son válidos junto al spool para revisarlos"""
+        with open(f'{self.spool.path}.rejected', 'a') as f:
+            for record, errors in rejected:
+                logger.error(f'Envío del spool rechazado: {errors}')
+                f.write(json.dumps({'record': record, 'errors': errors}, default=str) + '\n')
+
+    def compact(self):
+        """Vacía el archivo cuando todo está procesado y supera el tamaño configurado"""
+        if self.spool.size() < settings.SURVEY_SPOOL_COMPACT_BYTES:
+            return
+        with transaction.atomic():
+            checkpoint = self.checkpoint()
+            if self.spool.truncate_if_drained(checkpoint.offset):
+                checkpoint.offset = 0
+                checkpoint.save(update_fields=['offset', 'updated_at'])
+                self.stdout.write('Spool compactado.')
+
+    def print_stats(self):
+        checkpoint = IngestCheckpoint.objects.filter(name=self.spool.name).first()
+        offset = checkpoint.offset if checkpoint else 0
+        size = self.spool.size()
+        count, oldest = self.spool.pending(min(offset, size))
+        lag_seconds = (timezone.now() - oldest).total_seconds() if oldest else 0
+        self.stdout.write(f'spool: {self.spool.path}')
+        self.stdout.write(f'bytes pendientes: {max(size - offset, 0)} de {size}')
+        self.stdout.write(f'registros pendientes: {count}')
+        self.stdout.write(f'lag: {lag_seconds:.1f} s')
+        if checkpoint:
+            self.stdout.write(f'último checkpoint: {checkpoint.updated_at.isoformat()}')
@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from surveys.bundle import export_survey, init_worker
+from surveys.models import Survey
+
+
+class Command(BaseCommand):
+    help = (
+        'Exporta varias encuestas a Excel en paralelo (un proceso por libro) y '
+        'las empaqueta en un único ZIP, añadiendo cada libro en cuanto termina. '
+        'Informa el tiempo de cada encuesta.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('survey_ids', nargs='+', help='Encuestas a exportar')
+        parser.add_argument('--output', '-o', default='encuestas.zip',
+                            help='Archivo ZIP de salida ("-" para la salida estándar)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                            help='Procesos en paralelo')
+
+    def handle(self, *args, **options):
+        survey_ids = set()
+        for value in options['survey_ids']:
+            try:
+                survey_ids.add(uuid.UUID(value))
+            except ValueError:
+                raise CommandError(f'Id de encuesta inválido: {value}')
+        titles = dict(Survey.objects.filter(id__in=survey_ids).values_list('id', 'title'))
+        missing = survey_ids - set(titles)
+        if missing:
+            raise CommandError(
+                f'Encuestas no encontradas: {", ".join(sorted(str(survey_id) for survey_id in missing))}'
+            )
+
+        to_stdout = options['output'] == '-'
+        # Con el ZIP en la salida estándar el informe va a stderr
+        report = self.stderr if to_stdout else self.stdout
+        output = sys.stdout.buffer if to_stdout else open(options['output'], 'wb')
+
+        # Los procesos hijos abren sus propias conexiones
+        connections.close_all()
+        timings = []
+        failed = 0
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory() as directory, \
+                zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as bundle, \
+                ProcessPoolExecutor(max_workers=options['workers'],
+                                    mp_context=multiprocessing.get_context('spawn'),
+                                    initializer=init_worker) as pool:
+            futures = {
+                pool.submit(export_survey, survey_id, directory): survey_id
+                for survey_id in titles
+            }
+            for future in as_completed(futures):
+                survey_id = futures[future]
+                try:
+                    path, seconds = future.result()
+                except Exception as e:
+                    failed += 1
+                    report.write(self.style.ERROR(f'{survey_id}: error: {e}'))
+                    continue
+                bundle.write(path, os.path.basename(path))
+                os.remove(path)
+                timings.append((seconds, survey_id))
+                report.write(f'{survey_id}  {seconds:8.2f} s  {titles[survey_id]}')
+
+        if not to_stdout:
+            output.close()
+
+        report.write(f'\n{len(timings)} libros en {time.perf_counter() - start:.2f} s '
+                     f'({options["workers"]} procesos)')
+        if timings:
+            report.write('Más lentas:')
+            for seconds, survey_id in sorted(timings, reverse=True)[:5]:
+                report.write(f'  {seconds:8.2f} s  {titles[survey_id]} ({survey_id})')
+        if failed:
+            raise CommandError(f'{failed} encuesta(s) no se pudieron exportar.')
@@ -0,0 +1,134 @@
+import csv
+import hashlib
+import itertools
+import os
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from surveys.csv_import import ImportLayout, LayoutError, RowError
+from surveys.models import IngestCheckpoint, Survey
+from surveys.statistics import get_questions
+from surveys.submissions import copy_responses, save_responses
+from surveys.validation import get_schema
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa respuestas de una encuesta desde un CSV cuyas cabeceras son los '
+        'textos de las preguntas (el mismo formato que export_csv). Carga por '
+        'bloques con COPY en PostgreSQL o bulk_create en otras bases; la posición '
+        'se confirma con cada bloque, así que se puede interrumpir y relanzar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('survey', help='Id de la encuesta')
+        parser.add_argument('path', help='Archivo CSV')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Filas por transacción')
+        parser.add_argument('--method', choices=['auto', 'copy', 'bulk'], default='auto',
+                            help='auto: COPY en PostgreSQL, bulk_create en el resto')
+        parser.add_argument('--delimiter', default=',')
+        parser.add_argument('--encoding', default='utf-8-sig')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignorar el checkpoint y empezar desde la primera fila')
+
+    def handle(self, *args, **options):
+        try:
+            survey = Survey.objects.get(id=options['survey'])
+        except (Survey.DoesNotExist, ValidationError):
+            raise CommandError(f'Encuesta {options["survey"]} no encontrada')
+
+        method = options['method']
+        if method == 'auto':
+            method = 'copy' if connection.vendor == 'postgresql' else 'bulk'
+        elif method == 'copy' and connection.vendor != 'postgresql':
+            raise CommandError('COPY solo está disponible en PostgreSQL')
+        self.save = copy_responses if method == 'copy' else save_responses
+
+        path = os.path.abspath(options['path'])
+        self.name = f'csv-import:{survey.id}:{hashlib.sha1(path.encode()).hexdigest()[:16]}'
+        self.rejected_path = f'{path}.rejected.csv'
+        if options['restart']:
+            IngestCheckpoint.objects.filter(name=self.name).delete()
+
+        with open(path, newline='', encoding=options['encoding']) as f:
+            reader = csv.reader(f, delimiter=options['delimiter'])
+            headers = next(reader, None)
+            if headers is None:
+                raise CommandError('El archivo está vacío')
+            try:
+                layout = ImportLayout(get_questions(survey), headers)
+            except LayoutError as e:
+                raise CommandError(str(e))
+
+            checkpoint = IngestCheckpoint.objects.filter(name=self.name).first()
+            done = checkpoint.offset if checkpoint else 0
+            if done:
+                self.stdout.write(f'Reanudando desde la fila {done + 1}')
+            rows = itertools.islice(reader, done, None)
+
+            schema = get_schema(survey)
+            imported = rejected = 0
+            start = time.monotonic()
+            while True:
+                batch = list(itertools.islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                saved, failed = self.import_batch(survey, layout, schema, headers, batch, done)
+                done += len(batch)
+                imported += saved
+                rejected += failed
+                rate = (imported + rejected) / max(time.monotonic() - start, 1e-6)
+                self.stdout.write(
+                    f'{done} filas: {imported} importadas, {rejected} rechazadas ({rate:.0f} filas/s)'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Importación terminada ({method}): {imported} respuestas, {rejected} filas rechazadas'
+        ))
+        if rejected:
+            self.stdout.write(f'Filas rechazadas en {self.rejected_path}')
+
+    def import_batch(self, survey, layout, schema, headers, batch, offset):
+        pending, failed = [], []
+        for number, row in enumerate(batch, start=offset + 2):  # +1 cabecera, +1 base 1
+            try:
+                response, answers = layout.parse(survey, row)
+            except RowError as e:
+                failed.append((number, row, str(e)))
+                continue
+            errors = schema.validate(answers)
+            if errors:
+                failed.append((number, row, ' '.join(errors)))
+                continue
+            pending.append((response, answers))
+
+        # Los rechazos se anotan antes de confirmar: si el proceso se corta
+        # entre ambos pasos, a lo sumo se repiten en el archivo
+        if failed:
+            self.write_rejected(headers, failed)
+
+        with transaction.atomic():
+            checkpoint, _ = IngestCheckpoint.objects.select_for_update().get_or_create(name=self.name)
+            if checkpoint.offset != offset:
+                raise CommandError(
+                    f'El checkpoint está en la fila {checkpoint.offset} y se esperaba {offset}: '
+                    '¿hay otra importación del mismo archivo en curso?'
+                )
+            if pending:
+                self.save(pending)
+            checkpoint.offset = offset + len(batch)
+            checkpoint.save(update_fields=['offset', 'updated_at'])
+        return len(pending), len(failed)
+
+    def write_rejected(self, headers, failed):
+        is_new = not os.path.exists(self.rejected_path)
+        with open(self.rejected_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(['row', 'error'] + headers)
+            for number, row, error in failed:
+                writer.writerow([number, error] + row)
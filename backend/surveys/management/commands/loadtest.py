@@ -0,0 +1,205 @@
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def answers_from_public(survey, rng):
+    """Respuestas aleatorias a partir del JSON público de la encuesta"""
+    answers = []
+    for question in survey['questions']:
+        question_id = question['id']
+        options = question.get('options') or []
+        rows = question.get('matrix_rows') or []
+        columns = question.get('matrix_columns') or []
+        question_type = question['question_type']
+        if question_type == 'single' and options:
+            answers.append({'question': question_id, 'selected_option': rng.choice(options)['id']})
+        elif question_type == 'multiple' and options:
+            for option in rng.sample(options, rng.randint(1, len(options))):
+                answers.append({'question': question_id, 'selected_option': option['id']})
+        elif question_type == 'matrix' and columns:
+            for row in rows:
+                answers.append({
+                    'question': question_id,
+                    'matrix_row': row['id'],
+                    'matrix_column': rng.choice(columns)['id'],
+                })
+        elif question_type == 'matrix_mul' and columns:
+            for row in rows:
+                for column in rng.sample(columns, rng.randint(1, min(2, len(columns)))):
+                    answers.append({
+                        'question': question_id,
+                        'matrix_row': row['id'],
+                        'matrix_column': column['id'],
+                    })
+        elif question_type == 'open':
+            answers.append({'question': question_id, 'text_answer': f'Carga {rng.random():.6f}'})
+    return answers
+
+
+class Target:
+    """Servidor a medir: host, puerto y prefijo de la API"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        if parts.scheme != 'http' or not parts.hostname:
+            raise CommandError(f'URL no soportada (solo http://host:puerto): {url}')
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/') or '/api'
+
+
+class Run:
+    """Resultados de una pasada contra un servidor"""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.statuses = {}
+        self.open_connections = 0
+        self.peak_connections = 0
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga de los endpoints públicos (ver encuesta y responder) '
+        'con muchas conexiones concurrentes y clientes lentos opcionales. '
+        'Pasar varias --url (p. ej. el servidor WSGI en :8000 y el ASGI en '
+        ':8001) compara latencias p50/p99 y conexiones abiertas a la vez.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', action='append', required=True,
+                            help='Base de la API, p. ej. http://localhost:8000/api (repetible)')
+        parser.add_argument('--survey', required=True, help='Id de una encuesta activa y abierta')
+        parser.add_argument('--mode', choices=['public', 'respond'], default='public',
+                            help='Endpoint a medir')
+        parser.add_argument('--connections', type=int, default=100,
+                            help='Conexiones concurrentes')
+        parser.add_argument('--requests', type=int, default=1000,
+                            help='Peticiones totales por servidor')
+        parser.add_argument('--slow-ms', type=int, default=0,
+                            help='Simular clientes lentos: ms entre fragmentos del envío')
+        parser.add_argument('--chunks', type=int, default=4,
+                            help='Fragmentos en que se divide cada envío lento')
+        parser.add_argument('--timeout', type=float, default=30.0,
+                            help='Segundos máximos por petición')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        targets = [Target(url) for url in options['url']]
+        self.stdout.write(
+            f'{options["mode"]}: {options["requests"]} peticiones, '
+            f'{options["connections"]} conexiones, cliente lento {options["slow_ms"]} ms'
+        )
+        self.stdout.write(
+            f'{"servidor":<32} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8} '
+            f'{"máx ms":>8} {"conex.":>7} {"errores":>8}'
+        )
+        for target in targets:
+            run, elapsed = asyncio.run(self.run_target(target, options))
+            self.stdout.write(
+                f'{target.url:<32} {len(run.latencies) / elapsed:>8.1f} '
+                f'{percentile(run.latencies, 50):>8.1f} {percentile(run.latencies, 99):>8.1f} '
+                f'{max(run.latencies, default=0):>8.1f} {run.peak_connections:>7} {run.errors:>8}'
+            )
+            if run.errors:
+                self.stdout.write(f'  códigos: {run.statuses}')
+
+    async def run_target(self, target, options):
+        public_path = f'{target.prefix}/surveys/public/{options["survey"]}/'
+        requests = []
+        if options['mode'] == 'public':
+            requests = [('GET', public_path, b'')] * options['requests']
+        else:
+            status, body = await self.request(target, 'GET', public_path, b'', options['timeout'])
+            if status != 200:
+                raise CommandError(f'{target.url}: la encuesta pública respondió {status}')
+            survey = json.loads(body)
+            rng = random.Random(options['seed'])
+            respond_path = f'{target.prefix}/surveys/respond/'
+            for _ in range(options['requests']):
+                payload = {'survey': survey['id'], 'answers': answers_from_public(survey, rng)}
+                requests.append(('POST', respond_path, json.dumps(payload).encode()))
+
+        run = Run()
+        queue = asyncio.Queue()
+        for item in requests:
+            queue.put_nowait(item)
+
+        async def worker():
+            while not queue.empty():
+                method, path, body = queue.get_nowait()
+                await self.timed_request(target, run, method, path, body, options)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(options['connections'])))
+        return run, time.perf_counter() - start
+
+    async def timed_request(self, target, run, method, path, body, options):
+        start = time.perf_counter()
+        run.open_connections += 1
+        run.peak_connections = max(run.peak_connections, run.open_connections)
+        try:
+            status, _ = await self.request(
+                target, method, path, body, options['timeout'],
+                slow_ms=options['slow_ms'], chunks=options['chunks']
+            )
+        except (OSError, asyncio.TimeoutError, ValueError) as e:
+            status = type(e).__name__
+        finally:
+            run.open_connections -= 1
+        run.statuses[status] = run.statuses.get(status, 0) + 1
+        if status in (200, 201, 202):
+            run.latencies.append((time.perf_counter() - start) * 1000)
+        else:
+            run.errors += 1
+
+    async def request(self, target, method, path, body, timeout, slow_ms=0, chunks=1):
+        """Petición HTTP/1.1 mínima sobre una conexión nueva; devuelve (estado, cuerpo)"""
+        return await asyncio.wait_for(
+            self._request(target, method, path, body, slow_ms, chunks), timeout
+        )
+
+    async def _request(self, target, method, path, body, slow_ms, chunks):
+        reader, writer = await asyncio.open_connection(target.host, target.port)
+        try:
+            head = (
+                f'{method} {path} HTTP/1.1\r\n'
+                f'Host: {target.host}:{target.port}\r\n'
+                'Content-Type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                'Connection: close\r\n\r\n'
+            ).encode()
+            data = head + body
+            if slow_ms:
+                # Cliente lento: el servidor recibe la petición por partes
+                size = max(1, len(data) // max(chunks, 1))
+                for i in range(0, len(data), size):
+                    writer.write(data[i:i + size])
+                    await writer.drain()
+                    await asyncio.sleep(slow_ms / 1000)
+            else:
+                writer.write(data)
+                await writer.drain()
+
+            status_line = await reader.readline()
+            status = int(status_line.split()[1])
+            response = await reader.read()
+            _, _, content = response.partition(b'\r\n\r\n')
+            return status, content
+        finally:
+            writer.close()
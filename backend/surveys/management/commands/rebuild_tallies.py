@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from surveys.models import Survey
+from surveys.tallies import find_drift, rebuild_survey
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye los conteos acumulados (tallies) a partir de la tabla '
+        'answers. Con --check solo informa las diferencias sin modificar nada.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('survey_ids', nargs='*',
+                            help='Encuestas a procesar (por defecto, todas)')
+        parser.add_argument('--check', action='store_true',
+                            help='Solo detectar desviaciones; termina con error si hay alguna')
+
+    def handle(self, *args, **options):
+        surveys = Survey.objects.order_by('created_at')
+        if options['survey_ids']:
+            surveys = surveys.filter(id__in=options['survey_ids'])
+
+        drifted = 0
+        for survey in surveys.iterator():
+            if options['check']:
+                drift = find_drift(survey)
+                if not drift:
+                    continue
+                drifted += 1
+                self.stdout.write(self.style.WARNING(f'{survey.id} ({survey.title}):'))
+                for section, values in drift.items():
+                    for key, (stored, actual) in sorted(values.items(), key=str):
+                        self.stdout.write(f'  {section} {key}: tally={stored} real={actual}')
+            else:
+                counts = rebuild_survey(survey)
+                self.stdout.write(f'{survey.id}: {counts.responses} respuestas')
+
+        if options['check']:
+            if drifted:
+                raise CommandError(f'{drifted} encuesta(s) con tallies desviados.')
+            self.stdout.write(self.style.SUCCESS('Tallies consistentes.'))
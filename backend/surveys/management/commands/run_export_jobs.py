@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from surveys.exports import requeue_stale_jobs, run_job
+from surveys.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera las exportaciones a Excel pendientes (SURVEY_EXPORT_WORKER=command). '
+        'Cada trabajo se reclama con un UPDATE condicional, así que se pueden '
+        'ejecutar varios workers a la vez.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Segundos de espera cuando no hay trabajos')
+        parser.add_argument('--once', action='store_true',
+                            help='Procesar los trabajos pendientes y terminar')
+
+    def handle(self, *args, **options):
+        # Trabajos que quedaron en curso al terminar un worker anterior
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f'{requeued} exportaciones abandonadas vuelven a la cola')
+
+        while True:
+            pending = list(
+                ExportJob.objects.filter(status='pending')
+                .order_by('created_at')
+                .values_list('id', flat=True)
+            )
+            for job_id in pending:
+                if run_job(job_id):
+                    job = ExportJob.objects.get(id=job_id)
+                    self.stdout.write(f'Exportación {job.id}: {job.status}')
+            if options['once']:
+                break
+            if not pending:
+                time.sleep(options['interval'])
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0002_alter_question_question_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurveyTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('responses', models.IntegerField(default=0)),
+                ('survey', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tally', to='surveys.survey')),
+            ],
+            options={
+                'db_table': 'survey_tallies',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('respondents', models.IntegerField(default=0)),
+                ('text_answers', models.IntegerField(default=0)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tally', to='surveys.question')),
+            ],
+            options={
+                'db_table': 'question_tallies',
+            },
+        ),
+        migrations.CreateModel(
+            name='OptionTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('option', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='surveys.option')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='option_tallies', to='surveys.question')),
+            ],
+            options={
+                'db_table': 'option_tallies',
+            },
+        ),
+        migrations.CreateModel(
+            name='MatrixTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('matrix_column', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='surveys.matrixcolumn')),
+                ('matrix_row', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='surveys.matrixrow')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matrix_tallies', to='surveys.question')),
+            ],
+            options={
+                'db_table': 'matrix_tallies',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='optiontally',
+            constraint=models.UniqueConstraint(fields=('question', 'option'), name='unique_option_tally'),
+        ),
+        migrations.AddConstraint(
+            model_name='matrixtally',
+            constraint=models.UniqueConstraint(fields=('question', 'matrix_row', 'matrix_column'), name='unique_matrix_tally'),
+        ),
+        # Cargar los conteos de las respuestas ya existentes
+        migrations.RunSQL(
+            sql=[
+                "INSERT INTO survey_tallies (survey_id, responses) "
+                "SELECT survey_id, COUNT(*) FROM responses GROUP BY survey_id",
+                "INSERT INTO question_tallies (question_id, respondents, text_answers) "
+                "SELECT question_id, COUNT(DISTINCT response_id), "
+                "SUM(CASE WHEN text_answer <> '' THEN 1 ELSE 0 END) "
+                "FROM answers GROUP BY question_id",
+                "INSERT INTO option_tallies (question_id, option_id, count) "
+                "SELECT question_id, selected_option_id, COUNT(*) FROM answers "
+                "WHERE selected_option_id IS NOT NULL "
+                "GROUP BY question_id, selected_option_id",
+                "INSERT INTO matrix_tallies (question_id, matrix_row_id, matrix_column_id, count) "
+                "SELECT question_id, matrix_row_id, matrix_column_id, COUNT(*) FROM answers "
+                "WHERE matrix_row_id IS NOT NULL AND matrix_column_id IS NOT NULL "
+                "GROUP BY question_id, matrix_row_id, matrix_column_id",
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
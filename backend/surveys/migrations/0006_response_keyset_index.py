@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0005_export_jobs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['survey', 'id'], name='responses_survey_id_keyset'),
+        ),
+    ]
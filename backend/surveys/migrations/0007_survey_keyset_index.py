@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0006_response_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(fields=['created_at', 'id'], name='surveys_created_id_keyset'),
+        ),
+    ]
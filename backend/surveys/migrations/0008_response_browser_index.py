@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0007_survey_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['survey', 'submitted_at', 'id'], name='responses_survey_submitted'),
+        ),
+    ]
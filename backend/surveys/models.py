@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 import uuid
 
 
@@ -25,10 +26,21 @@ class Survey(models.Model):
     class Meta:
         ordering = ['-created_at']
         db_table = 'surveys'
+        indexes = [
+            # Paginación por cursor de los listados (ver pagination.py)
+            models.Index(fields=['created_at', 'id'], name='surveys_created_id_keyset'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Creador al cargar: signals.py detecta reasignaciones sin otra consulta
+        instance._loaded_creator_id = instance.__dict__.get('creator_id')
+        return instance
+
     @property
     def is_open(self):
         from django.utils import timezone
@@ -114,12 +126,20 @@ class Response(models.Model):
     survey = models.ForeignKey(Survey, on_delete=models.CASCADE, related_name='responses')
     respondent_name = models.CharField(max_length=200, blank=True)
     respondent_email = models.EmailField(blank=True)
-    submitted_at = models.DateTimeField(auto_now_add=True)
+    # default en vez de auto_now_add para poder conservar la hora de recepción
+    # de respuestas que se guardan después (spool de ingesta)
+    submitted_at = models.DateTimeField(default=timezone.now)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
 
     class Meta:
         ordering = ['-submitted_at']
         db_table = 'responses'
+        indexes = [
+            # Recorrido por bloques (id > último) de las respuestas de una encuesta
+            models.Index(fields=['survey', 'id'], name='responses_survey_id_keyset'),
+            # Navegador de respuestas: filtro por fechas y cursor (submitted_at, id)
+            models.Index(fields=['survey', 'submitted_at', 'id'], name='responses_survey_submitted'),
+        ]
 
     def __str__(self):
         return f"Respuesta a {self.survey.title} - {self.submitted_at}"
@@ -148,3 +168,99 @@ class Answer(models.Model):
             return f"{self.question.text}: {self.matrix_row.text} - {self.matrix_column.text}"
         return f"{self.question.text}: {self.text_answer}"
 
+
+
+class SurveyTally(models.Model):
+    """Total de respuestas de una encuesta, mantenido al guardar cada respuesta"""
+    survey = models.OneToOneField(Survey, on_delete=models.CASCADE, related_name='tally')
+    responses = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'survey_tallies'
+
+
+class QuestionTally(models.Model):
+    """Respuestas distintas y respuestas abiertas no vacías de una pregunta"""
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name='tally')
+    respondents = models.IntegerField(default=0)
+    text_answers = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'question_tallies'
+
+
+class OptionTally(models.Model):
+    """Conteo de respuestas por (pregunta, opción)"""
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='option_tallies')
+    option = models.ForeignKey(Option, on_delete=models.CASCADE, related_name='tallies')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'option_tallies'
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'option'], name='unique_option_tally'),
+        ]
+
+
+class MatrixTally(models.Model):
+    """Conteo de respuestas por (pregunta, fila, columna) de una matriz"""
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='matrix_tallies')
+    matrix_row = models.ForeignKey(MatrixRow, on_delete=models.CASCADE, related_name='tallies')
+    matrix_column = models.ForeignKey(MatrixColumn, on_delete=models.CASCADE, related_name='tallies')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'matrix_tallies'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['question', 'matrix_row', 'matrix_column'],
+                name='unique_matrix_tally'
+            ),
+        ]
+
+
+class IngestCheckpoint(models.Model):
+    """Posición hasta la que se procesó un archivo de ingesta (p. ej. el spool de respuestas)"""
+    name = models.CharField(max_length=200, unique=True)
+    offset = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'ingest_checkpoints'
+
+    def __str__(self):
+        return f"{self.name} @ {self.offset}"
+
+
+class ExportJob(models.Model):
+    """Exportación a Excel generada en segundo plano"""
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('running', 'En curso'),
+        ('done', 'Terminada'),
+        ('failed', 'Fallida'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    survey = models.ForeignKey(Survey, on_delete=models.CASCADE, related_name='export_jobs')
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='export_jobs'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    progress = models.PositiveSmallIntegerField(default=0)
+    # Identifica el contenido exportado (ver exports.artifact_key)
+    artifact_key = models.CharField(max_length=64)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'export_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Exportación {self.survey.title} ({self.status})"
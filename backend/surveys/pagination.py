@@ -0,0 +1,119 @@
+"""
+Paginación por cursor (keyset) para los listados de encuestas y respuestas.
+
+``CursorPagination`` de DRF solo filtra por el primer campo de la ordenación
+y desempata con un desplazamiento (OFFSET) limitado a 1000 filas. Aquí la
+posición del cursor guarda todos los campos de la ordenación, p. ej.
+``(created_at, id)``, y cada página se pide con una comparación
+lexicográfica sobre ellos: la página N cuesta lo mismo que la primera y no
+hace falta ningún COUNT(*).
+"""
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+
+class KeysetPagination(CursorPagination):
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    # El último campo de la ordenación debe ser único (normalmente el id)
+    ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            # La posición ya es única: el desplazamiento no se usa
+            _, reverse, current_position = self.cursor
+            self.cursor = Cursor(offset=0, reverse=reverse, position=current_position)
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        try:
+            if current_position is not None:
+                queryset = queryset.filter(self.position_filter(ordering, current_position))
+            # Un elemento de más para saber si hay página siguiente
+            results = list(queryset[:self.page_size + 1])
+        except (ValidationError, ValueError, TypeError):
+            # Cursor manipulado con valores que no corresponden a los campos
+            raise NotFound(self.invalid_cursor_message)
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def position_filter(self, ordering, position):
+        """
+        Filas posteriores a ``position`` según ``ordering``.
+
+        Para ``('-created_at', '-id')`` genera
+        ``created_at <= a AND (created_at < a OR (created_at = a AND id < b))``;
+        la primera condición permite recorrer el índice por rango.
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        fields = [(field.lstrip('-'), 'lt' if field.startswith('-') else 'gt') for field in ordering]
+        condition = Q()
+        for (name, lookup), value in reversed(list(zip(fields, values))):
+            after = Q(**{f'{name}__{lookup}': value})
+            condition = after if not condition else after | (Q(**{name: value}) & condition)
+        first, lookup = fields[0]
+        return Q(**{f'{first}__{lookup}e': values[0]}) & condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            value = getattr(instance, field.lstrip('-'))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+        return json.dumps(values)
+
+
+class SurveyCursorPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
+class ResponseCursorPagination(KeysetPagination):
+    ordering = ('-submitted_at', '-id')
@@ -0,0 +1,88 @@
+"""
+Exportación columnar (Parquet) de las answers de una encuesta.
+
+Una fila por answer, unida con su respuesta y con tipos explícitos, para
+cargarla en herramientas de BI sin parsear CSV. Se escribe por record
+batches con ``ParquetWriter`` recorriendo las respuestas por bloques (igual
+que raw_export), así que la memoria depende del tamaño del bloque.
+
+pyarrow es una dependencia opcional (``pip install pyarrow``): se importa
+solo al exportar.
+"""
+from .models import Answer, Response
+
+CHUNK_SIZE = 5000
+
+
+class ParquetUnavailable(Exception):
+    """pyarrow no está instalado"""
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ParquetUnavailable(
+            'La exportación Parquet requiere pyarrow (pip install pyarrow).'
+        )
+    return pyarrow, pyarrow.parquet
+
+
+def answers_schema(pa):
+    return pa.schema([
+        ('answer_id', pa.int64()),
+        ('response_id', pa.int64()),
+        ('submitted_at', pa.timestamp('us', tz='UTC')),
+        ('question_id', pa.int64()),
+        ('selected_option_id', pa.int64()),
+        ('matrix_row_id', pa.int64()),
+        ('matrix_column_id', pa.int64()),
+        ('text_answer', pa.string()),
+    ])
+
+
+def iter_batches(survey, pa, schema, chunk_size=CHUNK_SIZE):
+    """Un RecordBatch por bloque de respuestas"""
+    last_id = 0
+    while True:
+        responses = dict(
+            Response.objects.filter(survey=survey, id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'submitted_at')[:chunk_size]
+        )
+        if not responses:
+            return
+        last_id = max(responses)
+
+        columns = {name: [] for name in schema.names}
+        answers = (
+            Answer.objects.filter(response_id__in=responses)
+            .order_by('response_id', 'id')
+            .values_list('id', 'response_id', 'question_id', 'selected_option_id',
+                         'matrix_row_id', 'matrix_column_id', 'text_answer')
+            .iterator(chunk_size=chunk_size * 10)
+        )
+        for answer_id, response_id, question_id, option_id, row_id, column_id, text in answers:
+            columns['answer_id'].append(answer_id)
+            columns['response_id'].append(response_id)
+            columns['submitted_at'].append(responses[response_id])
+            columns['question_id'].append(question_id)
+            columns['selected_option_id'].append(option_id)
+            columns['matrix_row_id'].append(row_id)
+            columns['matrix_column_id'].append(column_id)
+            columns['text_answer'].append(text or None)
+        if columns['answer_id']:
+            yield pa.record_batch(
+                [pa.array(columns[field.name], type=field.type) for field in schema],
+                schema=schema
+            )
+
+
+def write_parquet(survey, file, chunk_size=CHUNK_SIZE):
+    """Escribe las answers de la encuesta en ``file`` (ruta o archivo binario)"""
+    pa, pq = _pyarrow()
+    schema = answers_schema(pa)
+    with pq.ParquetWriter(file, schema, compression='zstd') as writer:
+        for batch in iter_batches(survey, pa, schema, chunk_size):
+            writer.write_batch(batch)
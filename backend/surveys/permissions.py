@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from . import acl
+
 
 class IsAdminOrCreator(permissions.BasePermission):
     """Permite acceso a admin o creador"""
@@ -14,37 +16,24 @@ class IsSurveyCreatorOrAdmin(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.user.is_admin():
             return True
-        return obj.creator == request.user
+        # Comparar ids: no carga el creador
+        return obj.creator_id == request.user.pk
 
 
 class IsAssignedViewerOrAdmin(permissions.BasePermission):
     """Permite acceso a visualizadores asignados o admin"""
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated)
+
     def has_object_permission(self, request, view, obj):
-        if request.user.is_admin():
-            return True
-        if obj.creator == request.user:
-            return True
-        return request.user in obj.assigned_viewers.all()
+        return acl.can_view(request.user, obj)
 
 
 class CanViewStatistics(permissions.BasePermission):
     """Permite ver estadísticas si eres admin, creador o visualizador asignado"""
-    def has_object_permission(self, request, view, obj):
-        # Si no está autenticado, no puede ver estadísticas
-        if not request.user or not request.user.is_authenticated:
-            return False
-        
-        # Admin puede ver todo
-        if request.user.is_admin():
-            return True
-        
-        # El creador puede ver sus propias encuestas
-        if obj.creator == request.user:
-            return True
-        
-        # Visualizador puede ver encuestas asignadas
-        if request.user.role == 'viewer' and request.user in obj.assigned_viewers.all():
-            return True
-        
-        return False
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated)
 
+    def has_object_permission(self, request, view, obj):
+        # Sin consultas si la caché tiene las encuestas del usuario (ver acl.py)
+        return acl.can_view(request.user, obj)
@@ -0,0 +1,83 @@
+"""
+Documento público de cada encuesta, renderizado una vez a bytes JSON.
+
+La vista pública es la lectura más frecuente: en vez de serializar la
+encuesta completa en cada visita se guarda el JSON ya renderizado en la caché
+de Django, indexado por id y validado contra ``updated_at``. Las señales de
+``signals.py`` borran la entrada al guardar o eliminar la encuesta o
+cualquiera de sus preguntas, opciones, filas o columnas.
+
+Con varios procesos, la invalidación por señales solo llega a todos si la
+caché es compartida (``CACHE_BACKEND``); ``SURVEY_PUBLIC_CACHE_TIMEOUT``
+limita en cualquier caso cuánto puede vivir una entrada.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from config.renderers import FastJSONRenderer
+
+from .queries import questions_prefetch
+from .serializers import SurveyPublicSerializer
+
+
+class PublicDocument:
+    """JSON público de una encuesta y su ETag"""
+    __slots__ = ('updated_at', 'body', 'etag')
+
+    def __init__(self, updated_at, body):
+        self.updated_at = updated_at
+        self.body = body
+        self.etag = quote_etag(hashlib.md5(body).hexdigest())
+
+
+def cache_key(survey_id):
+    return f'survey-public:{survey_id}'
+
+
+def render(survey):
+    """Serializa la encuesta (preguntas incluidas) a bytes JSON"""
+    prefetch_related_objects([survey], questions_prefetch())
+    return FastJSONRenderer().render(SurveyPublicSerializer(survey).data)
+
+
+def _valid(document, survey):
+    return document is not None and document.updated_at == survey.updated_at
+
+
+def get_document(survey):
+    """PublicDocument de la encuesta, desde la caché si sigue vigente"""
+    document = cache.get(cache_key(survey.id))
+    if not _valid(document, survey):
+        document = PublicDocument(survey.updated_at, render(survey))
+        cache.set(cache_key(survey.id), document, settings.SURVEY_PUBLIC_CACHE_TIMEOUT)
+    return document
+
+
+async def aget_cached(survey):
+    """PublicDocument vigente desde la caché, o None (no renderiza)"""
+    document = await cache.aget(cache_key(survey.id))
+    return document if _valid(document, survey) else None
+
+
+def document_response(document, request):
+    """200 con los bytes del documento, o 304 si el cliente ya lo tiene (ETag o fecha)"""
+    response = get_conditional_response(
+        request, etag=document.etag, last_modified=int(document.updated_at.timestamp())
+    )
+    if response is None:
+        response = HttpResponse(document.body, content_type='application/json')
+    response['ETag'] = document.etag
+    response['Last-Modified'] = http_date(document.updated_at.timestamp())
+    # El navegador debe revalidar siempre: la encuesta puede cerrarse por fecha
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def invalidate(survey_id):
+    cache.delete(cache_key(survey_id))
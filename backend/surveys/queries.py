@@ -0,0 +1,94 @@
+"""
+Querysets compartidos por las vistas de encuestas.
+
+Las colecciones anidadas (preguntas, opciones, filas, columnas) se cargan con
+``Prefetch`` ordenados explícitamente, y los serializers solo recorren
+``.all()``: así una vista hace el mismo número de consultas sin importar
+cuántas preguntas tenga cada encuesta.
+"""
+from django.db.models import Count, Exists, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Question, Option, MatrixRow, MatrixColumn, Response, Answer
+
+
+def question_item_prefetches():
+    """Opciones, filas y columnas de cada pregunta, en su orden"""
+    return [
+        Prefetch('options', queryset=Option.objects.order_by('order')),
+        Prefetch('matrix_rows', queryset=MatrixRow.objects.order_by('order')),
+        Prefetch('matrix_columns', queryset=MatrixColumn.objects.order_by('order')),
+    ]
+
+
+def questions_prefetch():
+    """Preguntas de la encuesta, en orden y con sus colecciones precargadas"""
+    return Prefetch(
+        'questions',
+        queryset=Question.objects.order_by('order', 'created_at').prefetch_related(
+            *question_item_prefetches()
+        )
+    )
+
+
+def with_response_count(queryset):
+    """Anota ``response_count`` con una subconsulta (sin multiplicar filas)"""
+    responses = (
+        Response.objects.filter(survey=OuterRef('pk'))
+        .order_by()
+        .values('survey')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    return queryset.annotate(
+        response_count=Coalesce(Subquery(responses, output_field=IntegerField()), 0)
+    )
+
+
+def with_question_count(queryset):
+    """Anota ``question_count`` con una subconsulta"""
+    questions = (
+        Question.objects.filter(survey=OuterRef('pk'))
+        .order_by()
+        .values('survey')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    return queryset.annotate(
+        question_count=Coalesce(Subquery(questions, output_field=IntegerField()), 0)
+    )
+
+
+def survey_list_queryset(queryset):
+    """Lo que serializa SurveyListSerializer, en una sola consulta"""
+    return with_question_count(with_response_count(queryset)).select_related('creator')
+
+
+def survey_detail_queryset(queryset):
+    """Todo lo que serializa SurveySerializer, en un número fijo de consultas"""
+    return with_response_count(queryset).select_related('creator').prefetch_related(
+        questions_prefetch(), 'assigned_viewers'
+    )
+
+
+def filter_responses(queryset, submitted_after=None, submitted_before=None, email=None, option=None):
+    """Filtros del navegador de respuestas; ``option`` exige haber elegido esa opción"""
+    if submitted_after is not None:
+        queryset = queryset.filter(submitted_at__gte=submitted_after)
+    if submitted_before is not None:
+        queryset = queryset.filter(submitted_at__lte=submitted_before)
+    if email:
+        queryset = queryset.filter(respondent_email__iexact=email)
+    if option is not None:
+        queryset = queryset.filter(
+            Exists(Answer.objects.filter(response=OuterRef('pk'), selected_option_id=option))
+        )
+    return queryset
+
+
+def response_detail_queryset(queryset):
+    """Respuestas con sus answers y los textos de pregunta/opción/fila/columna en dos consultas"""
+    answers = Answer.objects.select_related(
+        'question', 'selected_option', 'matrix_row', 'matrix_column'
+    ).order_by('question__order', 'id')
+    return queryset.prefetch_related(Prefetch('answers', queryset=answers))
@@ -0,0 +1,167 @@
+"""
+Exportación de datos crudos: una fila por respuesta, una columna por pregunta.
+
+Las respuestas se recorren por bloques con paginación por clave (``id > último``)
+y las answers de cada bloque con ``.iterator()`` (cursor del lado del
+servidor en PostgreSQL). Cada bloque se pivota a filas anchas y se escribe en
+cuanto está listo, así que la memoria depende del tamaño del bloque y no del
+número de respuestas, y la cabecera sale antes de leer ninguna respuesta.
+
+Columnas por tipo de pregunta:
+- single, open: una columna con el texto de la opción o la respuesta.
+- multiple: una columna por opción (1 si se eligió).
+- matrix: una columna por fila con el texto de la columna elegida.
+- matrix_mul: una columna por celda fila × columna (1 si se eligió).
+
+En el CSV los textos que empiezan por ``=``, ``+``, ``-``, ``@``, tabulador o
+retorno de carro llevan delante un apóstrofo, para que una hoja de cálculo no
+los interprete como fórmulas (el texto libre lo escriben los encuestados).
+En NDJSON las columnas con el mismo nombre (opciones o filas repetidas de una
+pregunta) se distinguen con un sufijo ``(2)``, ``(3)``...
+"""
+import csv
+import io
+import json
+
+from .models import Answer, Response
+from .statistics import get_questions
+
+CHUNK_SIZE = 1000
+
+BASE_COLUMNS = ['response_id', 'submitted_at', 'respondent_name', 'respondent_email']
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_safe(value):
+    """Texto que una hoja de cálculo no evalúa como fórmula"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def unique_names(names):
+    """Nombres repetidos con sufijo (2), (3)... en el orden en que aparecen"""
+    seen = {}
+    unique = []
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        unique.append(name if seen[name] == 1 else f'{name} ({seen[name]})')
+    return unique
+
+
+class RawLayout:
+    """Columnas de la exportación y dónde va cada answer"""
+
+    def __init__(self, questions):
+        self.columns = list(BASE_COLUMNS)
+        self.by_question = {}   # question_id -> (tipo, índice) para single/open
+        self.by_option = {}     # option_id -> índice (multiple)
+        self.by_row = {}        # row_id -> índice (matrix)
+        self.by_cell = {}       # (row_id, column_id) -> índice (matrix_mul)
+        self.labels = {}        # option/column id -> texto
+
+        for number, question in enumerate(questions, start=1):
+            prefix = f'{number}. {question.text}'
+            question_type = question.question_type
+            for option in question.options.all():
+                self.labels[('option', option.id)] = option.text
+            for column in question.matrix_columns.all():
+                self.labels[('column', column.id)] = column.text
+
+            if question_type in ['single', 'open']:
+                self.by_question[question.id] = self._add(prefix)
+            elif question_type == 'multiple':
+                for option in question.options.all():
+                    self.by_option[option.id] = self._add(f'{prefix} [{option.text}]')
+            elif question_type == 'matrix':
+                for row in question.matrix_rows.all():
+                    self.by_row[row.id] = self._add(f'{prefix} [{row.text}]')
+            elif question_type == 'matrix_mul':
+                for row in question.matrix_rows.all():
+                    for column in question.matrix_columns.all():
+                        self.by_cell[(row.id, column.id)] = self._add(
+                            f'{prefix} [{row.text} / {column.text}]'
+                        )
+
+    def _add(self, name):
+        self.columns.append(name)
+        return len(self.columns) - 1
+
+    def place(self, values, question_id, option_id, row_id, column_id, text):
+        """Coloca una answer en la fila ``values``"""
+        if option_id is not None:
+            if option_id in self.by_option:
+                values[self.by_option[option_id]] = 1
+            elif question_id in self.by_question:
+                values[self.by_question[question_id]] = self.labels.get(('option', option_id))
+        elif row_id is not None:
+            if (row_id, column_id) in self.by_cell:
+                values[self.by_cell[(row_id, column_id)]] = 1
+            elif row_id in self.by_row:
+                values[self.by_row[row_id]] = self.labels.get(('column', column_id))
+        elif text and question_id in self.by_question:
+            values[self.by_question[question_id]] = text
+
+
+def iter_rows(survey, layout, chunk_size=CHUNK_SIZE):
+    """Filas anchas (listas) de todas las respuestas, por bloques de ``chunk_size``"""
+    last_id = 0
+    while True:
+        responses = list(
+            Response.objects.filter(survey=survey, id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'submitted_at', 'respondent_name', 'respondent_email')[:chunk_size]
+        )
+        if not responses:
+            return
+        last_id = responses[-1][0]
+
+        rows = {}
+        for response_id, submitted_at, name, email in responses:
+            values = [None] * len(layout.columns)
+            values[0:4] = [response_id, submitted_at.isoformat(), name, email]
+            rows[response_id] = values
+
+        answers = (
+            Answer.objects.filter(response_id__in=rows)
+            .values_list('response_id', 'question_id', 'selected_option_id',
+                         'matrix_row_id', 'matrix_column_id', 'text_answer')
+            .iterator(chunk_size=chunk_size * 10)
+        )
+        for response_id, *answer in answers:
+            layout.place(rows[response_id], *answer)
+
+        yield from rows.values()
+
+
+def stream_csv(survey, chunk_size=CHUNK_SIZE):
+    """Genera el CSV como bloques de texto"""
+    layout = RawLayout(get_questions(survey))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([csv_safe(name) for name in layout.columns])
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    for index, row in enumerate(iter_rows(survey, layout, chunk_size), start=1):
+        writer.writerow([csv_safe(value) for value in row])
+        if index % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_ndjson(survey, chunk_size=CHUNK_SIZE):
+    """Genera un objeto JSON por línea (claves = columnas del CSV)"""
+    layout = RawLayout(get_questions(survey))
+    keys = unique_names(layout.columns)
+    lines = []
+    for row in iter_rows(survey, layout, chunk_size):
+        lines.append(json.dumps(dict(zip(keys, row)), ensure_ascii=False))
+        if len(lines) >= chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
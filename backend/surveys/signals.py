@@ -0,0 +1,139 @@
+"""
+Invalidación de cachés derivadas de la definición de una encuesta.
+
+Al guardar o eliminar una encuesta se descartan el documento público
+renderizado y el esquema de validación compilado. Guardar una pregunta,
+opción, fila o columna además actualiza ``updated_at`` de la encuesta, que es
+lo que usan los ETag (conditional.py) y las cachés de otros procesos: una sola
+vez por transacción y encuesta, al confirmar (``PendingTouch``). Cada nivel
+de savepoint tiene su propio ``PendingTouch`` registrado con
+``transaction.on_commit``, así que si el savepoint se revierte Django lo
+descarta junto con los cambios.
+
+Los borrados de preguntas, opciones, filas y columnas no tienen receptores, para
+que Django los haga en bloque (con receptores de post_delete borra fila a fila)
+y el borrado de una encuesta no toque nada por cada hijo. Quien borre debe
+guardar la encuesta o llamar a ``touch_surveys``, igual que con las
+operaciones masivas (bulk_create/update), que tampoco emiten señales.
+
+Los cambios en ``assigned_viewers``, la creación de encuestas y los cambios de
+creador descartan el conjunto de encuestas visibles de los usuarios afectados
+(acl.py).
+"""
+from weakref import WeakKeyDictionary, WeakValueDictionary
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import acl, public_cache
+from .models import Survey, Question, Option, MatrixRow, MatrixColumn
+from .validation import schema_cache
+
+
+def invalidate_survey(survey_id):
+    if survey_id is None:
+        return
+    public_cache.invalidate(survey_id)
+    schema_cache.discard(survey_id)
+
+
+def touch_surveys(survey_ids):
+    """Marca las encuestas como modificadas (un UPDATE) e invalida sus cachés"""
+    survey_ids = set(survey_ids) - {None}
+    if not survey_ids:
+        return
+    Survey.objects.filter(id__in=survey_ids).update(updated_at=timezone.now())
+    for survey_id in survey_ids:
+        invalidate_survey(survey_id)
+
+
+class PendingTouch:
+    """Encuestas y preguntas modificadas en la transacción en curso"""
+
+    def __init__(self):
+        self.survey_ids = set()
+        self.question_ids = set()
+
+    def add(self, survey_id=None, question_id=None):
+        if survey_id is not None:
+            self.survey_ids.add(survey_id)
+        if question_id is not None:
+            self.question_ids.add(question_id)
+
+    def __call__(self):
+        survey_ids = set(self.survey_ids)
+        if self.question_ids:
+            survey_ids.update(
+                Question.objects.filter(id__in=self.question_ids).values_list('survey_id', flat=True)
+            )
+        touch_surveys(survey_ids)
+
+
+# Conexión -> {savepoints abiertos: PendingTouch}. Las referencias son débiles:
+# la única fuerte es la de on_commit, de modo que un PendingTouch desaparece
+# del registro cuando se ejecuta o cuando Django lo descarta por un rollback.
+_pending = WeakKeyDictionary()
+
+
+def schedule_touch(survey_id=None, question_id=None):
+    """touch_surveys al confirmar, una vez por transacción (fuera de una, en el acto)"""
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        pending = PendingTouch()
+        pending.add(survey_id, question_id)
+        pending()
+        return
+    registry = _pending.setdefault(connection, WeakValueDictionary())
+    key = tuple(connection.savepoint_ids)
+    pending = registry.get(key)
+    if pending is None:
+        pending = registry[key] = PendingTouch()
+        transaction.on_commit(pending)
+    pending.add(survey_id, question_id)
+
+
+@receiver([post_save, post_delete], sender=Survey)
+def survey_changed(sender, instance, **kwargs):
+    invalidate_survey(instance.id)
+
+
+@receiver(post_save, sender=Survey)
+def survey_creator_changed(sender, instance, created, **kwargs):
+    """Al crear la encuesta o cambiar su creador, el conjunto visible de ambos cambia"""
+    previous = getattr(instance, '_loaded_creator_id', None)
+    if created or previous != instance.creator_id:
+        acl.invalidate(previous, instance.creator_id)
+    instance._loaded_creator_id = instance.creator_id
+
+
+@receiver(m2m_changed, sender=Survey.assigned_viewers.through)
+def assigned_viewers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # clear() no informa pk_set: se guardan antes los afectados
+        if reverse:
+            instance._acl_cleared = [instance.pk]
+        else:
+            instance._acl_cleared = list(instance.assigned_viewers.values_list('id', flat=True))
+    elif action == 'post_clear':
+        acl.invalidate(*getattr(instance, '_acl_cleared', []))
+    elif action in ['post_add', 'post_remove']:
+        # Desde la encuesta pk_set son usuarios; desde el usuario, encuestas
+        acl.invalidate(*([instance.pk] if reverse else pk_set))
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, **kwargs):
+    schedule_touch(survey_id=instance.survey_id)
+
+
+@receiver(post_save, sender=Option)
+@receiver(post_save, sender=MatrixRow)
+@receiver(post_save, sender=MatrixColumn)
+def question_item_saved(sender, instance, **kwargs):
+    # Sin cargar la pregunta: si no está en memoria se resuelve al confirmar
+    if sender._meta.get_field('question').is_cached(instance):
+        schedule_touch(survey_id=instance.question.survey_id)
+    else:
+        schedule_touch(question_id=instance.question_id)
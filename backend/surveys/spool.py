@@ -0,0 +1,138 @@
+"""
+Spool local de respuestas (ingesta diferida).
+
+Con ``SURVEY_INGEST_MODE = 'spool'`` el endpoint público valida el envío, lo
+añade como una línea JSON a un archivo de solo anexado y responde 202 sin
+esperar a PostgreSQL. El comando ``drain_spool`` lee el archivo por bloques y
+guarda las respuestas con inserciones masivas.
+
+La posición leída se guarda en ``IngestCheckpoint`` dentro de la misma
+transacción que las respuestas, así que tras una caída el worker retoma
+exactamente donde se confirmó el último bloque: sin pérdidas ni duplicados.
+"""
+import fcntl
+import json
+import os
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+
+class Spool:
+    """Archivo NDJSON de solo anexado, compartido entre procesos del mismo host"""
+
+    def __init__(self, path, fsync=True):
+        self.path = str(path)
+        self.fsync = fsync
+
+    @property
+    def name(self):
+        """Nombre del checkpoint asociado a este archivo"""
+        return f'spool:{os.path.abspath(self.path)}'
+
+    def _open(self, mode):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        return open(self.path, mode)
+
+    def append(self, payload, ip_address=None):
+        """Añade un envío validado; vuelve cuando está escrito (y sincronizado) en disco"""
+        line = json.dumps({
+            'received_at': timezone.now().isoformat(),
+            'ip_address': ip_address,
+            'payload': payload,
+        }, separators=(',', ':'), default=str).encode() + b'\n'
+        with self._open('a+b') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                # Si una escritura anterior quedó cortada por una caída, cerrar
+                # esa línea para no corromper la siguiente
+                size = os.fstat(f.fileno()).st_size
+                if size and os.pread(f.fileno(), 1, size - 1) != b'\n':
+                    f.write(b'\n')
+                f.write(line)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def read(self, offset, limit):
+        """
+        Hasta ``limit`` registros completos desde ``offset``.
+
+        Devuelve (registros, offset_final); las líneas que no son JSON válido
+        se devuelven como None para que el llamador las descarte.
+        """
+        records = []
+        try:
+            f = self._open('rb')
+        except FileNotFoundError:
+            return records, offset
+        with f:
+            f.seek(offset)
+            while len(records) < limit:
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    # Línea incompleta: todavía se está escribiendo
+                    break
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    records.append(None)
+        return records, offset
+
+    def pending(self, offset):
+        """(registros pendientes, hora de recepción del más antiguo) desde offset"""
+        count = 0
+        oldest = None
+        try:
+            f = self._open('rb')
+        except FileNotFoundError:
+            return count, oldest
+        with f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n') or not line.strip():
+                    continue
+                count += 1
+                if oldest is None:
+                    try:
+                        oldest = datetime.fromisoformat(json.loads(line)['received_at'])
+                    except (ValueError, KeyError):
+                        pass
+        return count, oldest
+
+    def truncate_if_drained(self, offset):
+        """
+        Vacía el archivo si todo fue procesado (offset == tamaño).
+
+        Bloquea a los escritores mientras comprueba y trunca. Devuelve True si
+        truncó; el llamador debe poner el checkpoint a 0 después.
+        """
+        with self._open('ab') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.fstat(f.fileno()).st_size != offset:
+                    return False
+                f.truncate(0)
+                return True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def get_spool():
+    return Spool(settings.SURVEY_SPOOL_PATH, fsync=settings.SURVEY_SPOOL_FSYNC)
+
+
+def spooling_enabled():
+    return settings.SURVEY_INGEST_MODE == 'spool'
@@ -0,0 +1,109 @@
+"""
+Escritura de respuestas a encuestas.
+
+Comparte el camino de guardado entre el endpoint público de una respuesta y
+el de lotes: las respuestas, todas sus answers y los tallies se insertan con
+operaciones masivas dentro de una transacción. ``copy_responses`` hace lo
+mismo con COPY en PostgreSQL para importaciones grandes.
+"""
+import csv
+import io
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import tallies
+from .models import Response, Answer
+
+ANSWERS_BATCH_SIZE = 2000
+
+RESPONSE_COPY_FIELDS = ['id', 'survey', 'respondent_name', 'respondent_email', 'submitted_at', 'ip_address']
+ANSWER_COPY_FIELDS = ['response', 'question', 'selected_option', 'matrix_row', 'matrix_column', 'text_answer']
+
+
+def survey_closed_error(survey, now=None):
+    """Mensaje de error si la encuesta no admite respuestas ahora, o None"""
+    now = now or timezone.now()
+    if not survey.is_active:
+        return 'Esta encuesta no está activa.'
+    if now < survey.start_date:
+        return f'Esta encuesta aún no está disponible. Inicia el {survey.start_date.isoformat()}.'
+    if now > survey.end_date:
+        return f'Esta encuesta ya cerró el {survey.end_date.isoformat()}.'
+    return None
+
+
+def build_answer(response, answer_data):
+    return Answer(
+        response=response,
+        question_id=answer_data['question'],
+        selected_option_id=answer_data.get('selected_option'),
+        matrix_row_id=answer_data.get('matrix_row'),
+        matrix_column_id=answer_data.get('matrix_column'),
+        text_answer=answer_data.get('text_answer') or ''
+    )
+
+
+@transaction.atomic
+def save_responses(pending):
+    """
+    Guarda respuestas ya validadas.
+
+    ``pending`` es una lista de (Response sin guardar, lista de answers
+    validadas). Devuelve las Response guardadas, en el mismo orden.
+    """
+    responses = Response.objects.bulk_create([response for response, _ in pending])
+    answers = Answer.objects.bulk_create([
+        build_answer(response, answer_data)
+        for response, (_, answers_data) in zip(responses, pending)
+        for answer_data in answers_data
+    ], batch_size=ANSWERS_BATCH_SIZE)
+    tallies.record(responses, answers)
+    return responses
+
+
+def _copy(cursor, model, field_names, objs):
+    """COPY ... FROM STDIN (formato CSV) de los campos indicados de objs"""
+    fields = [model._meta.get_field(name) for name in field_names]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in objs:
+        writer.writerow([field.get_db_prep_value(getattr(obj, field.attname), connection) for field in fields])
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    # En CSV un valor vacío sin comillas es NULL; los campos de texto no lo admiten
+    text_columns = [quote(field.column) for field in fields if field.get_internal_type() in ('CharField', 'TextField')]
+    options = 'FORMAT csv'
+    if text_columns:
+        options += f', FORCE_NOT_NULL ({", ".join(text_columns)})'
+    cursor.cursor.copy_expert(
+        f'COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN WITH ({options})', buffer
+    )
+
+
+@transaction.atomic
+def copy_responses(pending):
+    """
+    Como save_responses, pero cargando responses y answers con COPY (solo
+    PostgreSQL). Los ids de las respuestas se reservan antes en la secuencia
+    para poder referenciarlos desde las answers.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+            [Response._meta.db_table, Response._meta.pk.column, len(pending)]
+        )
+        for (response, _), (response_id,) in zip(pending, cursor.fetchall()):
+            response.id = response_id
+        responses = [response for response, _ in pending]
+        answers = [
+            build_answer(response, answer_data)
+            for response, answers_data in pending
+            for answer_data in answers_data
+        ]
+        _copy(cursor, Response, RESPONSE_COPY_FIELDS, responses)
+        _copy(cursor, Answer, ANSWER_COPY_FIELDS, answers)
+    tallies.record(responses, answers)
+    return responses
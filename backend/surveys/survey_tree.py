@@ -0,0 +1,160 @@
+"""
+Escritura masiva del árbol de una encuesta (preguntas, opciones, filas y
+columnas).
+
+``create_questions`` inserta las preguntas con un bulk_create y después sus
+opciones, filas y columnas con uno por modelo. ``apply_questions`` compara
+las preguntas recibidas (datos ya validados por SurveySerializer) con las
+guardadas y solo escribe lo que cambia: bulk_create para lo nuevo,
+bulk_update para lo modificado y ``QuerySet.delete()`` para lo que ya no
+viene: como los hijos no tienen receptores de post_delete (ver signals.py),
+Django borra los dependientes con un DELETE por tabla. El número de
+sentencias depende de qué tipos de cambio hay, no del tamaño de la encuesta
+ni de cuántas filas cambian.
+
+``clone_survey`` copia una encuesta completa reutilizando ``create_questions``
+(las preguntas nuevas se emparejan con las originales por posición).
+
+Las operaciones masivas no emiten señales: quien llame debe guardar la
+encuesta al terminar (ver signals.py) y hacerlo dentro de una transacción.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+
+from .models import Survey, Question, Option, MatrixRow, MatrixColumn
+from .queries import question_item_prefetches
+
+QUESTION_FIELDS = ['text', 'question_type', 'is_required', 'order']
+ITEM_FIELDS = ['text', 'order']
+# (clave en los datos / related_name, modelo)
+ITEM_MODELS = [('options', Option), ('matrix_rows', MatrixRow), ('matrix_columns', MatrixColumn)]
+
+
+def create_questions(survey, questions_data):
+    """Crea las preguntas con sus opciones, filas y columnas; devuelve las preguntas"""
+    questions = Question.objects.bulk_create([
+        Question(survey=survey, **{field: data[field] for field in QUESTION_FIELDS if field in data})
+        for data in questions_data
+    ])
+    new_items = {model: [] for _, model in ITEM_MODELS}
+    for question, data in zip(questions, questions_data):
+        for key, model in ITEM_MODELS:
+            for idx, item in enumerate(data.get(key) or []):
+                new_items[model].append(
+                    model(question=question, text=item['text'], order=item.get('order', idx))
+                )
+    for model, objs in new_items.items():
+        if objs:
+            model.objects.bulk_create(objs)
+    return questions
+
+
+def _assign(obj, data, fields):
+    """Copia los campos presentes en data; devuelve True si alguno cambió"""
+    changed = False
+    for field in fields:
+        if field in data and getattr(obj, field) != data[field]:
+            setattr(obj, field, data[field])
+            changed = True
+    return changed
+
+
+class TreeChanges:
+    """Objetos a crear, actualizar y borrar, agrupados por modelo"""
+
+    def __init__(self):
+        self.create = {model: [] for _, model in ITEM_MODELS}
+        self.update = {model: [] for _, model in ITEM_MODELS}
+        self.delete = {model: [] for _, model in ITEM_MODELS}
+
+    def diff_items(self, question, model, existing, items_data):
+        """Como QuestionSerializer.update: el orden por defecto es la posición en la lista"""
+        existing = {item.id: item for item in existing}
+        for idx, data in enumerate(items_data):
+            data = {'order': idx, **data}
+            item = existing.pop(data.get('id'), None)
+            if item is None:
+                self.create[model].append(model(question=question, text=data['text'], order=data['order']))
+            elif _assign(item, data, ITEM_FIELDS):
+                self.update[model].append(item)
+        self.delete[model] += existing.keys()
+
+    def save(self):
+        for _, model in ITEM_MODELS:
+            if self.delete[model]:
+                model.objects.filter(id__in=self.delete[model]).delete()
+            if self.update[model]:
+                model.objects.bulk_update(self.update[model], ITEM_FIELDS)
+            if self.create[model]:
+                model.objects.bulk_create(self.create[model])
+
+
+def apply_questions(survey, questions_data):
+    """
+    Deja las preguntas de la encuesta como en questions_data.
+
+    Las preguntas, opciones, filas y columnas con un id existente se
+    actualizan (se conservan sus Answers); las demás se crean y las que no
+    vienen se eliminan. Si una pregunta no trae options/matrix_rows/
+    matrix_columns, esa colección no se toca.
+    """
+    existing = {
+        question.id: question
+        for question in survey.questions.prefetch_related(*question_item_prefetches())
+    }
+    changed_questions, new_questions = [], []
+    changes = TreeChanges()
+
+    for data in questions_data:
+        question = existing.pop(data.get('id'), None)
+        if question is None:
+            new_questions.append(data)
+            continue
+        if _assign(question, data, QUESTION_FIELDS):
+            changed_questions.append(question)
+        for key, model in ITEM_MODELS:
+            if data.get(key) is not None:
+                changes.diff_items(question, model, getattr(question, key).all(), data[key])
+
+    # Las que quedan no vinieron en el payload (el borrado arrastra sus Answers)
+    if existing:
+        Question.objects.filter(id__in=existing.keys()).delete()
+    changes.save()
+    if changed_questions:
+        Question.objects.bulk_update(changed_questions, QUESTION_FIELDS)
+    if new_questions:
+        create_questions(survey, new_questions)
+
+
+def question_data(question):
+    """Pregunta guardada (con colecciones precargadas) en el formato de create_questions"""
+    data = {field: getattr(question, field) for field in QUESTION_FIELDS}
+    for key, _ in ITEM_MODELS:
+        data[key] = [{'text': item.text, 'order': item.order} for item in getattr(question, key).all()]
+    return data
+
+
+def clone_survey(survey, creator, title=None, start_date=None, keep_viewers=True):
+    """
+    Copia la encuesta con sus preguntas, opciones, filas y columnas (sin
+    respuestas) en un número fijo de consultas. Con ``start_date`` ambas fechas
+    se desplazan lo mismo, conservando la duración.
+    """
+    shift = start_date - survey.start_date if start_date is not None else timedelta(0)
+    questions = survey.questions.order_by('order', 'created_at').prefetch_related(
+        *question_item_prefetches()
+    )
+    with transaction.atomic():
+        copy = Survey.objects.create(
+            title=title or f'{survey.title} (copia)',
+            description=survey.description,
+            creator=creator,
+            start_date=survey.start_date + shift,
+            end_date=survey.end_date + shift,
+            is_active=survey.is_active,
+        )
+        if keep_viewers:
+            copy.assigned_viewers.set(survey.assigned_viewers.values_list('id', flat=True))
+        create_questions(copy, [question_data(question) for question in questions])
+    return copy
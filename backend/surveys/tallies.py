@@ -0,0 +1,245 @@
+"""
+Conteos acumulados de respuestas (tallies).
+
+Cada respuesta guardada suma sus conteos a las tablas ``*_tallies`` dentro de
+la misma transacción, de modo que las estadísticas y la exportación leen un
+número de filas proporcional a las preguntas y no a las respuestas.
+
+``count_answers`` recalcula los mismos conteos desde la tabla ``answers``; se
+usa para reconstruir los tallies y para detectar desviaciones.
+"""
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from .models import (
+    Answer, Response, SurveyTally, QuestionTally, OptionTally, MatrixTally
+)
+
+# Filas por sentencia INSERT ... ON CONFLICT
+UPSERT_BATCH_SIZE = 500
+
+
+class SurveyCounts:
+    """Conteos agregados de una encuesta, indexados por ids"""
+
+    def __init__(self):
+        # Total de respuestas (Response) de la encuesta
+        self.responses = 0
+        # (question_id, option_id) -> cantidad
+        self.options = defaultdict(int)
+        # (question_id, matrix_row_id, matrix_column_id) -> cantidad
+        self.cells = defaultdict(int)
+        # question_id -> respuestas (Response) distintas que contestaron la pregunta
+        self.respondents = defaultdict(int)
+        # question_id -> respuestas abiertas no vacías
+        self.text_answers = defaultdict(int)
+
+    def as_dict(self):
+        """Representación comparable (sin ceros) para detectar desviaciones"""
+        def non_zero(mapping):
+            return {key: value for key, value in mapping.items() if value}
+
+        return {
+            'responses': self.responses,
+            'options': non_zero(self.options),
+            'cells': non_zero(self.cells),
+            'respondents': non_zero(self.respondents),
+            'text_answers': non_zero(self.text_answers),
+        }
+
+
+def count_answers(survey):
+    """Recalcula los conteos desde la tabla answers con consultas agrupadas"""
+    counts = SurveyCounts()
+    counts.responses = Response.objects.filter(survey=survey).count()
+    answers = Answer.objects.filter(question__survey=survey).order_by()
+
+    grouped = answers.values(
+        'question_id', 'selected_option_id', 'matrix_row_id', 'matrix_column_id'
+    ).annotate(
+        total=Count('id'),
+        with_text=Count('id', filter=~Q(text_answer='')),
+    )
+    for row in grouped:
+        question_id = row['question_id']
+        if row['selected_option_id'] is not None:
+            counts.options[(question_id, row['selected_option_id'])] += row['total']
+        if row['matrix_row_id'] is not None and row['matrix_column_id'] is not None:
+            key = (question_id, row['matrix_row_id'], row['matrix_column_id'])
+            counts.cells[key] += row['total']
+        counts.text_answers[question_id] += row['with_text']
+
+    # Las respuestas distintas por pregunta no se pueden sumar desde la
+    # agrupación anterior (una respuesta múltiple cae en varias opciones)
+    respondents = answers.values('question_id').annotate(
+        total=Count('response_id', distinct=True)
+    )
+    for row in respondents:
+        counts.respondents[row['question_id']] = row['total']
+
+    return counts
+
+
+def load_counts(survey):
+    """Lee los conteos de una encuesta desde los tallies"""
+    counts = SurveyCounts()
+    counts.responses = SurveyTally.objects.filter(survey=survey).values_list(
+        'responses', flat=True
+    ).first() or 0
+
+    for question_id, respondents, text_answers in QuestionTally.objects.filter(
+        question__survey=survey
+    ).values_list('question_id', 'respondents', 'text_answers'):
+        counts.respondents[question_id] = respondents
+        counts.text_answers[question_id] = text_answers
+
+    for question_id, option_id, count in OptionTally.objects.filter(
+        question__survey=survey
+    ).values_list('question_id', 'option_id', 'count'):
+        counts.options[(question_id, option_id)] = count
+
+    for question_id, row_id, column_id, count in MatrixTally.objects.filter(
+        question__survey=survey
+    ).values_list('question_id', 'matrix_row_id', 'matrix_column_id', 'count'):
+        counts.cells[(question_id, row_id, column_id)] = count
+
+    return counts
+
+
+def _upsert(model, key_fields, value_fields, rows):
+    """INSERT ... ON CONFLICT DO UPDATE sumando los valores a los existentes"""
+    if not rows:
+        return
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = [qn(f) for f in key_fields + value_fields]
+    updates = ', '.join(
+        f'{qn(f)} = {table}.{qn(f)} + EXCLUDED.{qn(f)}' for f in value_fields
+    )
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    fields = [model._meta.get_field(f) for f in key_fields + value_fields]
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[start:start + UPSERT_BATCH_SIZE]
+            cursor.execute(
+                f'INSERT INTO {table} ({", ".join(columns)}) '
+                f'VALUES {", ".join([placeholders] * len(batch))} '
+                f'ON CONFLICT ({", ".join(qn(f) for f in key_fields)}) '
+                f'DO UPDATE SET {updates}',
+                [
+                    field.get_db_prep_value(value, connection)
+                    for row in batch for field, value in zip(fields, row)
+                ]
+            )
+
+
+def record(responses, answers):
+    """
+    Suma a los tallies las respuestas recién creadas.
+
+    ``responses`` y ``answers`` son instancias ya guardadas (pueden pertenecer
+    a varias encuestas). Debe llamarse dentro de la misma transacción que las
+    inserta.
+    """
+    respondents = set()
+    text_answers = Counter()
+    options = Counter()
+    cells = Counter()
+
+    for answer in answers:
+        respondents.add((answer.question_id, answer.response_id))
+        if answer.text_answer:
+            text_answers[answer.question_id] += 1
+        if answer.selected_option_id is not None:
+            options[(answer.question_id, answer.selected_option_id)] += 1
+        if answer.matrix_row_id is not None and answer.matrix_column_id is not None:
+            cells[(answer.question_id, answer.matrix_row_id, answer.matrix_column_id)] += 1
+
+    # Filas ordenadas por clave para que transacciones concurrentes tomen los
+    # bloqueos en el mismo orden
+    surveys = Counter(response.survey_id for response in responses)
+    questions = Counter(question_id for question_id, _ in respondents)
+    _upsert(
+        SurveyTally, ['survey_id'], ['responses'],
+        sorted(surveys.items(), key=lambda item: str(item[0]))
+    )
+    _upsert(
+        QuestionTally, ['question_id'], ['respondents', 'text_answers'],
+        sorted((q, n, text_answers[q]) for q, n in questions.items())
+    )
+    _upsert(
+        OptionTally, ['question_id', 'option_id'], ['count'],
+        sorted(key + (n,) for key, n in options.items())
+    )
+    _upsert(
+        MatrixTally, ['question_id', 'matrix_row_id', 'matrix_column_id'], ['count'],
+        sorted(key + (n,) for key, n in cells.items())
+    )
+
+
+def _lock_survey_tally(survey):
+    """
+    Bloquea la fila SurveyTally de la encuesta (creándola si no existe).
+
+    record() actualiza primero esa fila, así que las respuestas de esta
+    encuesta esperan a que termine la reconstrucción; las de otras encuestas
+    no se bloquean.
+    """
+    _upsert(SurveyTally, ['survey_id'], ['responses'], [(survey.id, 0)])
+
+
+@transaction.atomic
+def rebuild_survey(survey):
+    """Reemplaza los tallies de una encuesta por los recalculados desde answers"""
+    _lock_survey_tally(survey)
+    counts = count_answers(survey)
+
+    QuestionTally.objects.filter(question__survey=survey).delete()
+    OptionTally.objects.filter(question__survey=survey).delete()
+    MatrixTally.objects.filter(question__survey=survey).delete()
+
+    SurveyTally.objects.filter(survey=survey).update(responses=counts.responses)
+    question_ids = set(counts.respondents) | set(counts.text_answers)
+    QuestionTally.objects.bulk_create([
+        QuestionTally(
+            question_id=question_id,
+            respondents=counts.respondents.get(question_id, 0),
+            text_answers=counts.text_answers.get(question_id, 0),
+        )
+        for question_id in question_ids
+    ], batch_size=UPSERT_BATCH_SIZE)
+    OptionTally.objects.bulk_create([
+        OptionTally(question_id=question_id, option_id=option_id, count=count)
+        for (question_id, option_id), count in counts.options.items()
+    ], batch_size=UPSERT_BATCH_SIZE)
+    MatrixTally.objects.bulk_create([
+        MatrixTally(
+            question_id=question_id, matrix_row_id=row_id,
+            matrix_column_id=column_id, count=count
+        )
+        for (question_id, row_id, column_id), count in counts.cells.items()
+    ], batch_size=UPSERT_BATCH_SIZE)
+    return counts
+
+
+def find_drift(survey):
+    """Diferencias entre tallies y answers: {sección: {clave: (tally, real)}}"""
+    stored = load_counts(survey).as_dict()
+    actual = count_answers(survey).as_dict()
+    drift = {}
+    for section, actual_values in actual.items():
+        stored_values = stored[section]
+        if section == 'responses':
+            if stored_values != actual_values:
+                drift[section] = {None: (stored_values, actual_values)}
+            continue
+        diff = {
+            key: (stored_values.get(key, 0), actual_values.get(key, 0))
+            for key in set(stored_values) | set(actual_values)
+            if stored_values.get(key, 0) != actual_values.get(key, 0)
+        }
+        if diff:
+            drift[section] = diff
+    return drift
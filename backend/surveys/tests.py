@@ -0,0 +1,163 @@
+"""
+Número de consultas de los endpoints de lectura y peticiones condicionales.
+
+Cada endpoint se mide con encuestas de dos tamaños: el número de consultas
+debe ser el mismo, de modo que un N+1 (una consulta por pregunta, opción o
+encuesta) hace fallar la prueba.
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from .models import Survey
+from .management.commands._bench import build_survey, fill_responses
+from .validation import schema_cache
+
+SIZES = [5, 25]
+
+
+class QueryCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        schema_cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='x', role='admin')
+        self.viewer = User.objects.create_user(username='viewer', password='x', role='viewer')
+        self.client = APIClient()
+
+    def build(self, n_questions, n_responses=0):
+        survey = build_survey(n_questions, creator=self.admin)
+        survey.assigned_viewers.add(self.viewer)
+        if n_responses:
+            fill_responses(survey, n_responses)
+        return survey
+
+    def assertQueriesPerSize(self, expected, get_url, user=None, build=None):
+        """Misma cantidad de consultas para cada tamaño de SIZES"""
+        self.client.force_authenticate(user)
+        for size in SIZES:
+            with self.subTest(size=size):
+                url = get_url(size) if build is None else get_url(build(size))
+                with self.assertNumQueries(expected):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_list(self):
+        def surveys(count):
+            for i in range(count):
+                self.build(i % 5 + 1)
+            return '/api/surveys/'
+
+        self.assertQueriesPerSize(1, surveys, user=self.admin)
+
+    def test_list_viewer(self):
+        def surveys(count):
+            for i in range(count):
+                self.build(i % 5 + 1)
+            return '/api/surveys/'
+
+        # Con la caché local por defecto, asignadas y creadas van en una subconsulta (acl.py)
+        self.assertQueriesPerSize(1, surveys, user=self.viewer)
+
+    def test_retrieve(self):
+        self.assertQueriesPerSize(
+            9, lambda survey: f'/api/surveys/{survey.id}/', user=self.admin,
+            build=lambda size: self.build(size, n_responses=3),
+        )
+
+    def test_public(self):
+        self.assertQueriesPerSize(
+            5, lambda survey: f'/api/surveys/public/{survey.id}/',
+            build=self.build,
+        )
+
+    def test_statistics(self):
+        self.assertQueriesPerSize(
+            12, lambda survey: f'/api/surveys/{survey.id}/statistics/', user=self.viewer,
+            build=lambda size: self.build(size, n_responses=3),
+        )
+
+
+class ConditionalTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='x', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_detail_changes_when_survey_closes(self):
+        survey = build_survey(3, creator=self.admin)
+        now = timezone.now()
+        survey.end_date = now + timedelta(seconds=2)
+        survey.save()
+        url = f'/api/surveys/{survey.id}/'
+
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.data['is_open'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        with mock.patch('django.utils.timezone.now', return_value=now + timedelta(seconds=3)):
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertFalse(second.data['is_open'])
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+
+class TouchTests(TestCase):
+    def setUp(self):
+        self.survey = build_survey(3)
+        self.question = self.survey.questions.first()
+
+    def updated_at(self):
+        return Survey.objects.values_list('updated_at', flat=True).get(pk=self.survey.pk)
+
+    def test_touch_once_per_transaction(self):
+        before = self.updated_at()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.question.save()
+            for option in self.question.options.all():
+                option.save()
+        self.assertEqual(len(callbacks), 1)
+        self.assertGreater(self.updated_at(), before)
+
+    def test_rolled_back_savepoint_does_not_touch(self):
+        other = build_survey(1)
+        before = self.updated_at()
+        with self.captureOnCommitCallbacks(execute=True):
+            other.questions.first().save()
+            try:
+                with transaction.atomic():
+                    self.question.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(self.updated_at(), before)
+
+
+class SurveyUpdateTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='x', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_put_removing_items(self):
+        """Quitar preguntas, opciones y filas: mismas sentencias para cada tamaño"""
+        for size in SIZES:
+            with self.subTest(size=size):
+                survey = build_survey(size, creator=self.admin)
+                url = f'/api/surveys/{survey.id}/'
+                data = self.client.get(url).data
+                questions = data['questions'][:-2]
+                for question in questions:
+                    question['options'] = question['options'][:2]
+                    question['matrix_rows'] = question['matrix_rows'][:1]
+                payload = {key: data[key] for key in ('title', 'start_date', 'end_date')}
+                with self.assertNumQueries(39):
+                    response = self.client.put(url, {**payload, 'questions': questions}, format='json')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(survey.questions.count(), size - 2)
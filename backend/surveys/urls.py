@@ -1,11 +1,22 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import SurveyViewSet, SurveyPublicView, ResponseCreateView
+from .views import SurveyViewSet, SurveyPublicView, ResponseCreateView, ResponseBatchCreateView
+
+if settings.SURVEY_ASYNC_VIEWS:
+    # Endpoints públicos asíncronos (servir con ASGI: uvicorn config.asgi:application)
+    from .async_views import ResponseCreateAsyncView, SurveyPublicAsyncView
+    respond_view = ResponseCreateAsyncView
+    public_view = SurveyPublicAsyncView
+else:
+    respond_view = ResponseCreateView
+    public_view = SurveyPublicView.as_view()
 
 urlpatterns = [
     # Rutas específicas primero (antes del router para que tengan prioridad)
-    path('surveys/respond/', ResponseCreateView, name='survey-respond'),
-    path('surveys/public/<uuid:id>/', SurveyPublicView.as_view(), name='survey-public'),
+    path('surveys/respond/', respond_view, name='survey-respond'),
+    path('surveys/respond/batch/', ResponseBatchCreateView, name='survey-respond-batch'),
+    path('surveys/public/<uuid:id>/', public_view, name='survey-public'),
 ]
 
 # Router al final para que no capture las rutas específicas
@@ -0,0 +1,159 @@
+"""
+Validación compilada de respuestas por encuesta.
+
+La definición de cada encuesta (tipo de pregunta, opciones, filas, columnas y
+si es obligatoria) se compila una vez en mapas en memoria y se guarda en una
+caché del proceso indexada por (id, updated_at). Así, validar un envío no
+necesita ninguna consulta adicional a la de la propia encuesta: cualquier
+edición hecha con ``SurveySerializer.update`` guarda la encuesta y cambia
+``updated_at``, lo que deja obsoleta la entrada anterior.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import Question
+
+
+class QuestionSpec:
+    """Lo necesario para validar las respuestas a una pregunta"""
+    __slots__ = ('id', 'text', 'question_type', 'is_required', 'options', 'rows', 'columns')
+
+    def __init__(self, question):
+        self.id = question.id
+        self.text = question.text
+        self.question_type = question.question_type
+        self.is_required = question.is_required
+        self.options = frozenset(option.id for option in question.options.all())
+        self.rows = frozenset(row.id for row in question.matrix_rows.all())
+        self.columns = frozenset(column.id for column in question.matrix_columns.all())
+
+
+class SurveySchema:
+    """Definición compilada de una encuesta"""
+
+    def __init__(self, survey, questions):
+        self.survey_id = survey.id
+        self.updated_at = survey.updated_at
+        self.questions = {question.id: QuestionSpec(question) for question in questions}
+
+    def _check_answer(self, spec, answer, seen):
+        """Devuelve un mensaje de error o None"""
+        option = answer.get('selected_option')
+        row = answer.get('matrix_row')
+        column = answer.get('matrix_column')
+        text = answer.get('text_answer') or ''
+        question_type = spec.question_type
+
+        if question_type in ['single', 'multiple']:
+            if option is None or row is not None or column is not None:
+                return 'debe indicar solo selected_option'
+            if option not in spec.options:
+                return f'la opción {option} no pertenece a la pregunta'
+            key = None if question_type == 'single' else option
+        elif question_type in ['matrix', 'matrix_mul']:
+            if row is None or column is None or option is not None:
+                return 'debe indicar matrix_row y matrix_column'
+            if row not in spec.rows:
+                return f'la fila {row} no pertenece a la pregunta'
+            if column not in spec.columns:
+                return f'la columna {column} no pertenece a la pregunta'
+            key = row if question_type == 'matrix' else (row, column)
+        elif question_type == 'open':
+            if option is not None or row is not None or column is not None:
+                return 'solo admite text_answer'
+            key = None
+        else:
+            return f'tipo de pregunta desconocido: {question_type}'
+
+        if (spec.id, key) in seen:
+            return 'respuesta duplicada'
+        seen.add((spec.id, key))
+        if question_type != 'open' and text:
+            return 'no admite text_answer'
+        return None
+
+    def validate(self, answers):
+        """
+        Valida una lista de dicts de respuesta (ids ya convertidos a int).
+
+        Devuelve la lista de errores (vacía si el envío es válido).
+        """
+        errors = []
+        seen = set()
+        answered = set()
+        for index, answer in enumerate(answers):
+            spec = self.questions.get(answer.get('question'))
+            if spec is None:
+                errors.append(
+                    f'Respuesta {index}: la pregunta {answer.get("question")} no pertenece a esta encuesta.'
+                )
+                continue
+            error = self._check_answer(spec, answer, seen)
+            if error:
+                errors.append(f'Respuesta {index} ("{spec.text[:50]}"): {error}.')
+            elif spec.question_type != 'open' or (answer.get('text_answer') or '').strip():
+                answered.add(spec.id)
+
+        for spec in self.questions.values():
+            if spec.is_required and spec.id not in answered:
+                errors.append(f'La pregunta "{spec.text[:50]}" es obligatoria.')
+        return errors
+
+
+def compile_survey(survey):
+    """Compila la definición de una encuesta (cuatro consultas)"""
+    questions = Question.objects.filter(survey=survey).prefetch_related(
+        'options', 'matrix_rows', 'matrix_columns'
+    )
+    return SurveySchema(survey, questions)
+
+
+class SchemaCache:
+    """Caché LRU en memoria de SurveySchema, indexada por (id, updated_at)"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def peek(self, survey):
+        """Esquema en caché si sigue vigente, sin compilar (no hace consultas)"""
+        with self._lock:
+            schema = self._entries.get(survey.id)
+            if schema is not None and schema.updated_at == survey.updated_at:
+                return schema
+        return None
+
+    def get(self, survey):
+        with self._lock:
+            schema = self._entries.get(survey.id)
+            if schema is not None and schema.updated_at == survey.updated_at:
+                self._entries.move_to_end(survey.id)
+                return schema
+
+        # Compilar fuera del lock; si dos hilos compilan a la vez el resultado es el mismo
+        schema = compile_survey(survey)
+        with self._lock:
+            self._entries[survey.id] = schema
+            self._entries.move_to_end(survey.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return schema
+
+    def discard(self, survey_id):
+        with self._lock:
+            self._entries.pop(survey_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+schema_cache = SchemaCache(settings.SURVEY_SCHEMA_CACHE_SIZE)
+
+
+def get_schema(survey):
+    """SurveySchema de la encuesta, desde la caché si sigue vigente"""
+    return schema_cache.get(survey)
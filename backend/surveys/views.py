@@ -3,39 +3,75 @@ from rest_framework.decorators import action, api_view, permission_classes, auth
 from rest_framework.response import Response as DRFResponse
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import APIView
+from rest_framework.exceptions import NotFound
+from rest_framework.generics import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
+from accounts.authentication import StatelessJWTAuthentication
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.http import JsonResponse
 import json
-from django.db.models import Count, Q
-from django.http import HttpResponse
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-from openpyxl.chart import PieChart, BarChart, Reference
-from .models import Survey, Question, Response, Answer, Option, MatrixRow, MatrixColumn
+from django.http import FileResponse, StreamingHttpResponse
+import tempfile
+from .models import Survey, Question, Response, Option, MatrixRow, MatrixColumn, ExportJob
 from .serializers import (
-    SurveySerializer, SurveyPublicSerializer, QuestionSerializer,
-    ResponseSerializer
+    SurveySerializer, SurveyListSerializer, SurveyPublicSerializer, QuestionSerializer,
+    ResponseSerializer, ExportJobSerializer, ResponseDetailSerializer, ResponseFilterSerializer,
+    SurveyCloneSerializer, survey_key
 )
 from .permissions import (
     IsAdminOrCreator, IsSurveyCreatorOrAdmin, 
     IsAssignedViewerOrAdmin, CanViewStatistics
 )
+from .submissions import survey_closed_error, save_responses
+from .spool import get_spool, spooling_enabled
+from .statistics import survey_statistics
+from .excel_export import write_workbook
+from .exports import start_export, job_path
+from .raw_export import stream_csv, stream_ndjson
+from .parquet_export import write_parquet, ParquetUnavailable
+from . import acl, public_cache
+from .queries import (
+    survey_detail_queryset, survey_list_queryset, filter_responses, response_detail_queryset
+)
+from .conditional import survey_validators
+from .pagination import SurveyCursorPagination, ResponseCursorPagination
+from .survey_tree import clone_survey
 
 
 class SurveyViewSet(viewsets.ModelViewSet):
     serializer_class = SurveySerializer
+    # Lecturas con el usuario de las claims del token; escrituras con el User real
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    # Cursor sobre (created_at, id): sin COUNT(*) ni OFFSET
+    pagination_class = SurveyCursorPagination
 
-    def get_queryset(self):
+    def get_base_queryset(self):
+        """Encuestas visibles para el usuario, sin precargas"""
         user = self.request.user
         if user.is_admin():
             return Survey.objects.all()
         elif user.is_creator():
-            return Survey.objects.filter(creator=user)
+            return Survey.objects.filter(creator_id=user.pk)
         else:  # viewer
-            return Survey.objects.filter(
-                Q(assigned_viewers=user) | Q(creator=user)
-            ).distinct()
+            # Asignadas o creadas sin join ni DISTINCT (acl.py)
+            return acl.viewable_surveys(user)
+
+    def get_queryset(self):
+        queryset = self.get_base_queryset()
+        if self.action == 'list':
+            # Solo columnas y conteos anotados: una consulta por página
+            queryset = survey_list_queryset(queryset)
+        elif self.action == 'retrieve':
+            # Encuesta con preguntas, opciones, creador y conteo en pocas consultas fijas
+            queryset = survey_detail_queryset(queryset)
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return SurveyListSerializer
+        return super().get_serializer_class()
 
     def get_permissions(self):
         if self.action == 'list' or self.action == 'retrieve':
@@ -46,6 +82,21 @@ class SurveyViewSet(viewsets.ModelViewSet):
             return [IsSurveyCreatorOrAdmin()]
         return super().get_permissions()
 
+    def get_base_object(self):
+        """Como get_object, pero sin las precargas de la acción (una sola consulta)"""
+        queryset = self.filter_queryset(self.get_base_queryset())
+        survey = get_object_or_404(queryset, pk=self.kwargs['pk'])
+        self.check_object_permissions(self.request, survey)
+        return survey
+
+    def retrieve(self, request, *args, **kwargs):
+        # Comprobar ETag/Last-Modified antes de cargar y serializar las preguntas
+        validators = survey_validators(self.get_base_object(), 'detail')
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+        return validators.apply(super().retrieve(request, *args, **kwargs))
+
     def update(self, request, *args, **kwargs):
         """No permitir editar encuestas que ya tengan al menos una respuesta."""
         survey = self.get_object()
@@ -66,121 +117,55 @@ class SurveyViewSet(viewsets.ModelViewSet):
             )
         return super().partial_update(request, *args, **kwargs)
 
+    def perform_create(self, serializer):
+        self.save_and_reload(serializer)
+
+    def perform_update(self, serializer):
+        self.save_and_reload(serializer)
+
+    def save_and_reload(self, serializer):
+        survey = serializer.save()
+        # Releer con las precargas de retrieve para responder sin una consulta por pregunta
+        serializer.instance = survey_detail_queryset(Survey.objects.filter(pk=survey.pk)).get()
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
 
+    @action(detail=True, methods=['post'], permission_classes=[IsAdminOrCreator])
+    def clone(self, request, pk=None):
+        """Copiar la encuesta (preguntas, opciones, filas y columnas; sin respuestas)"""
+        survey = self.get_base_object()
+        options = SurveyCloneSerializer(data=request.data)
+        options.is_valid(raise_exception=True)
+        copy = clone_survey(
+            survey,
+            request.user,
+            title=options.validated_data.get('title'),
+            start_date=options.validated_data.get('start_date'),
+            keep_viewers=not options.validated_data['reset_viewers'],
+        )
+        copy = survey_detail_queryset(Survey.objects.filter(pk=copy.pk)).get()
+        return DRFResponse(
+            self.get_serializer(copy).data,
+            status=status.HTTP_201_CREATED
+        )
+
     @action(detail=True, methods=['get'], permission_classes=[CanViewStatistics])
     def statistics(self, request, pk=None):
         """Obtener estadísticas de una encuesta"""
+        # get_object ya comprueba CanViewStatistics (permission_classes de la acción)
+        survey = self.get_object()
+
+        validators = survey_validators(survey, 'statistics')
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
         try:
-            survey = self.get_object()
-        except Survey.DoesNotExist:
-            return DRFResponse(
-                {'error': 'Encuesta no encontrada.'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Verificar permisos explícitamente
-        if not CanViewStatistics().has_object_permission(request, self, survey):
-            return DRFResponse(
-                {'error': 'No tienes permisos para ver las estadísticas de esta encuesta.'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        try:
-            stats = {
-                'survey': {
-                    'id': str(survey.id),
-                    'title': survey.title,
-                    'total_responses': survey.total_responses,
-                },
-                'questions': []
-            }
-            
-            for question in survey.questions.all():
-                question_stats = {
-                    'id': question.id,
-                    'text': question.text,
-                    'question_type': question.question_type,  # Cambiar 'type' a 'question_type' para consistencia
-                    'total_answers': 0,
-                    'data': {}
-                }
-                
-                try:
-                    if question.question_type == 'single':
-                        # Contar respuestas por opción
-                        answers = Answer.objects.filter(
-                            question=question,
-                            selected_option__isnull=False
-                        ).values('selected_option__text').annotate(
-                            count=Count('id')
-                        )
-                        question_stats['data'] = {
-                            option['selected_option__text']: option['count']
-                            for option in answers
-                        }
-                        question_stats['total_answers'] = sum(question_stats['data'].values()) if question_stats['data'] else 0
-                    
-                    elif question.question_type == 'multiple':
-                        # Contar respuestas por opción (puede haber múltiples por respuesta)
-                        answers = Answer.objects.filter(
-                            question=question,
-                            selected_option__isnull=False
-                        ).values('selected_option__text').annotate(
-                            count=Count('id')
-                        )
-                        question_stats['data'] = {
-                            option['selected_option__text']: option['count']
-                            for option in answers
-                        }
-                        question_stats['total_answers'] = Answer.objects.filter(
-                            question=question
-                        ).values('response').distinct().count()
-                    
-                    elif question.question_type in ['matrix', 'matrix_mul']:
-                        # Contar respuestas por fila y columna
-                        matrix_data = {}
-                        answers = Answer.objects.filter(
-                            question=question,
-                            matrix_row__isnull=False,
-                            matrix_column__isnull=False
-                        ).values('matrix_row__text', 'matrix_column__text').annotate(
-                            count=Count('id')
-                        )
-                        
-                        for answer in answers:
-                            row = answer.get('matrix_row__text', '')
-                            col = answer.get('matrix_column__text', '')
-                            if row and col:
-                                if row not in matrix_data:
-                                    matrix_data[row] = {}
-                                matrix_data[row][col] = answer['count']
-                        
-                        question_stats['data'] = matrix_data
-                        question_stats['total_answers'] = Answer.objects.filter(
-                            question=question
-                        ).values('response').distinct().count()
-
-                    elif question.question_type == 'open':
-                        # Contar cuántas respuestas de texto hay (no vacías)
-                        total_text = Answer.objects.filter(
-                            question=question
-                        ).exclude(text_answer__isnull=True).exclude(text_answer__exact='').count()
-                        question_stats['data'] = {'Respuestas abiertas': total_text}
-                        question_stats['total_answers'] = total_text
-                except Exception as e:
-                    # Si hay error procesando una pregunta, continuar con las demás
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.error(f'Error procesando pregunta {question.id}: {str(e)}')
-                    question_stats['data'] = {}
-                    question_stats['total_answers'] = 0
-                
-                stats['questions'].append(question_stats)
-            
-            return DRFResponse(stats)
+            # Todos los conteos salen de consultas agrupadas (ver statistics.py)
+            return validators.apply(DRFResponse(survey_statistics(survey)))
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
@@ -194,243 +179,134 @@ class SurveyViewSet(viewsets.ModelViewSet):
     def export_excel(self, request, pk=None):
         """Exportar estadísticas a Excel con gráficas (una pregunta por página)"""
         survey = self.get_object()
-        
-        wb = Workbook()
-        # Eliminar la hoja por defecto
-        wb.remove(wb.active)
-        
-        # Estilos
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-        title_font = Font(bold=True, size=16)
-        question_font = Font(bold=True, size=14)
-        subtitle_font = Font(bold=True, size=12)
-        
-        question_num = 1
-        for question in survey.questions.all():
-            # Crear una hoja nueva para cada pregunta
-            ws = wb.create_sheet(title=f"Pregunta {question_num}")
-            
-            # Encabezado de la encuesta
-            ws['A1'] = f"Encuesta: {survey.title}"
-            ws['A1'].font = title_font
-            ws.merge_cells('A1:F1')
-            
-            ws['A2'] = f"Total de respuestas: {survey.total_responses}"
-            ws['A2'].font = subtitle_font
-            ws.merge_cells('A2:F2')
-            
-            row = 4
-            
-            # Título de pregunta
-            ws[f'A{row}'] = f"Pregunta {question_num}: {question.text}"
-            ws[f'A{row}'].font = question_font
-            ws.merge_cells(f'A{row}:F{row}')
-            row += 2
-            
-            if question.question_type in ['single', 'multiple']:
-                # Encabezados de tabla
-                ws[f'A{row}'] = "Opción"
-                ws[f'B{row}'] = "Cantidad"
-                ws[f'C{row}'] = "Porcentaje"
-                for col in ['A', 'B', 'C']:
-                    cell = ws[f'{col}{row}']
-                    cell.fill = header_fill
-                    cell.font = header_font
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                row += 1
-                
-                # Calcular total de respuestas (distintas por respuesta para multiple)
-                if question.question_type == 'single':
-                    total = Answer.objects.filter(
-                        question=question,
-                        selected_option__isnull=False
-                    ).count()
-                else:  # multiple
-                    total = Answer.objects.filter(
-                        question=question
-                    ).values('response').distinct().count()
-                
-                # Obtener datos
-                answers = Answer.objects.filter(
-                    question=question,
-                    selected_option__isnull=False
-                ).values('selected_option__text').annotate(
-                    count=Count('id')
-                ).order_by('-count')
-                
-                data_start_row = row
-                for answer in answers:
-                    option_text = answer['selected_option__text']
-                    count = answer['count']
-                    percentage = (count / total * 100) if total > 0 else 0
-                    
-                    ws[f'A{row}'] = option_text
-                    ws[f'B{row}'] = count
-                    ws[f'C{row}'] = f"{percentage:.1f}%"
-                    # Alinear datos
-                    ws[f'A{row}'].alignment = Alignment(horizontal='left')
-                    ws[f'B{row}'].alignment = Alignment(horizontal='center')
-                    ws[f'C{row}'].alignment = Alignment(horizontal='center')
-                    row += 1
-                
-                data_end_row = row - 1
-                
-                # Espaciado antes de las gráficas
-                row += 2
-                
-                # Gráficas (igual que en la web: pastel y barras)
-                if total > 0 and data_end_row >= data_start_row:
-                    # Gráfica de pastel (superior, columna E)
-                    pie_chart = PieChart()
-                    pie_chart.title = f"Pregunta {question_num}"
-                    data_ref = Reference(ws, min_col=2, min_row=data_start_row, max_row=data_end_row)
-                    cats_ref = Reference(ws, min_col=1, min_row=data_start_row, max_row=data_end_row)
-                    pie_chart.add_data(data_ref, titles_from_data=False)
-                    pie_chart.set_categories(cats_ref)
-                    pie_chart.width = 14
-                    pie_chart.height = 8
-                    pie_chart.legend.position = 'r'  # Right
-                    ws.add_chart(pie_chart, f'E{row}')
-                    
-                    # Gráfica de barras (inferior, columna E, más abajo)
-                    bar_chart = BarChart()
-                    bar_chart.type = "col"
-                    bar_chart.style = 10
-                    bar_chart.title = f"Pregunta {question_num}"
-                    bar_chart.y_axis.title = 'Cantidad'
-                    bar_chart.x_axis.title = 'Opción'
-                    bar_chart.add_data(data_ref, titles_from_data=False)
-                    bar_chart.set_categories(cats_ref)
-                    bar_chart.width = 14
-                    bar_chart.height = 8
-                    bar_chart.legend.position = 'r'
-                    # Colocar la gráfica de barras más abajo
-                    chart_row = row + 18
-                    ws.add_chart(bar_chart, f'E{chart_row}')
-            
-            elif question.question_type in ['matrix', 'matrix_mul']:
-                # Obtener columnas y filas ordenadas
-                columns = question.matrix_columns.all().order_by('order')
-                rows_data = question.matrix_rows.all().order_by('order')
-                col_headers = [col.text for col in columns]
-                
-                # Encabezados de tabla
-                ws[f'A{row}'] = "Fila / Columna"
-                ws[f'A{row}'].fill = header_fill
-                ws[f'A{row}'].font = header_font
-                ws[f'A{row}'].alignment = Alignment(horizontal='center', vertical='center')
-                
-                for idx, col_header in enumerate(col_headers, start=1):
-                    cell = ws.cell(row=row, column=idx+1)
-                    cell.value = col_header
-                    cell.fill = header_fill
-                    cell.font = header_font
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                
-                row += 1
-                
-                # Datos por fila
-                data_start_row = row
-                
-                for matrix_row in rows_data:
-                    ws[f'A{row}'] = matrix_row.text
-                    ws[f'A{row}'].alignment = Alignment(horizontal='left')
-                    for idx, col in enumerate(columns, start=1):
-                        count = Answer.objects.filter(
-                            question=question,
-                            matrix_row=matrix_row,
-                            matrix_column=col
-                        ).count()
-                        cell = ws.cell(row=row, column=idx+1, value=count)
-                        cell.alignment = Alignment(horizontal='center')
-                    row += 1
-                
-                data_end_row = row - 1
-                
-                # Espaciado antes de las gráficas
-                row += 2
-                
-                # Para matrices, dejar espacio para gráfica de pastel (aunque no se muestre)
-                if data_end_row >= data_start_row and len(col_headers) > 0:
-                    # Espacio reservado para gráfica de pastel (no se crea, solo espacio)
-                    
-                    # Gráfica de barras agrupadas (igual que en la web)
-                    bar_chart = BarChart()
-                    bar_chart.type = "col"
-                    bar_chart.style = 10
-                    bar_chart.title = f"Pregunta {question_num}"
-                    bar_chart.y_axis.title = 'Cantidad'
-                    bar_chart.x_axis.title = 'Opciones'
-                    
-                    # Referencia de datos: incluir encabezados de columnas
-                    data_ref = Reference(ws, min_col=2, min_row=data_start_row-1, 
-                                       max_col=len(col_headers)+1, max_row=data_end_row)
-                    cats_ref = Reference(ws, min_col=1, min_row=data_start_row, max_row=data_end_row)
-                    bar_chart.add_data(data_ref, titles_from_data=True)
-                    bar_chart.set_categories(cats_ref)
-                    bar_chart.width = 14
-                    bar_chart.height = 8
-                    bar_chart.legend.position = 'b'  # Bottom
-                    # Colocar la gráfica de barras más abajo para dejar espacio arriba
-                    chart_row = row + 18
-                    ws.add_chart(bar_chart, f'E{chart_row}')
-
-            elif question.question_type == 'open':
-                # Listar todas las respuestas de texto sin gráficas
-                ws[f'A{row}'] = "Respuestas abiertas"
-                ws[f'A{row}'].font = subtitle_font
-                ws.merge_cells(f'A{row}:F{row}')
-                row += 2
-
-                ws[f'A{row}'] = "N°"
-                ws[f'B{row}'] = "Respuesta"
-                ws[f'A{row}'].fill = header_fill
-                ws[f'B{row}'].fill = header_fill
-                ws[f'A{row}'].font = header_font
-                ws[f'B{row}'].font = header_font
-                row += 1
-
-                answers_qs = Answer.objects.filter(
-                    question=question
-                ).exclude(text_answer__isnull=True).exclude(text_answer__exact='')
-
-                idx = 1
-                for ans in answers_qs:
-                    ws[f'A{row}'] = idx
-                    ws[f'B{row}'] = ans.text_answer
-                    ws[f'B{row}'].alignment = Alignment(wrap_text=True)
-                    row += 1
-                    idx += 1
-            
-            # Ajustar ancho de columnas para esta hoja
-            ws.column_dimensions['A'].width = 35
-            ws.column_dimensions['B'].width = 15
-            ws.column_dimensions['C'].width = 15
-            ws.column_dimensions['D'].width = 2
-            ws.column_dimensions['E'].width = 2
-            ws.column_dimensions['F'].width = 2
-            
-            # Congelar encabezados
-            ws.freeze_panes = 'A4'
-            
-            question_num += 1
-        
-        response = HttpResponse(
+        # El libro se escribe fila a fila en un temporal (memoria constante) y
+        # se envía por bloques; el archivo se borra al cerrar la respuesta
+        file = tempfile.TemporaryFile()
+        try:
+            write_workbook(survey, file)
+        except Exception:
+            file.close()
+            raise
+        file.seek(0)
+        return FileResponse(
+            file,
+            as_attachment=True,
+            filename=f'encuesta_{survey.id}.xlsx',
             content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
-        response['Content-Disposition'] = f'attachment; filename="encuesta_{survey.id}.xlsx"'
-        wb.save(response)
+
+
+    @action(detail=True, methods=['get'], permission_classes=[CanViewStatistics])
+    def export_csv(self, request, pk=None):
+        """Datos crudos en CSV: una fila por respuesta, una columna por pregunta/opción/celda"""
+        survey = self.get_object()
+        response = StreamingHttpResponse(stream_csv(survey), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="respuestas_{survey.id}.csv"'
         return response
 
+    @action(detail=True, methods=['get'], permission_classes=[CanViewStatistics])
+    def export_ndjson(self, request, pk=None):
+        """Datos crudos en NDJSON (un objeto JSON por respuesta)"""
+        survey = self.get_object()
+        response = StreamingHttpResponse(stream_ndjson(survey), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="respuestas_{survey.id}.ndjson"'
+        return response
+
+    @action(detail=True, methods=['get'], permission_classes=[CanViewStatistics])
+    def export_parquet(self, request, pk=None):
+        """Answers en Parquet (columnar, tipado) para herramientas de BI"""
+        survey = self.get_object()
+        file = tempfile.TemporaryFile()
+        try:
+            write_parquet(survey, file)
+        except ParquetUnavailable as e:
+            file.close()
+            return DRFResponse({'error': str(e)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        except Exception:
+            file.close()
+            raise
+        file.seek(0)
+        return FileResponse(
+            file,
+            as_attachment=True,
+            filename=f'answers_{survey.id}.parquet',
+            content_type='application/vnd.apache.parquet'
+        )
+
+    @action(detail=True, methods=['get'], url_path='responses', url_name='responses',
+            permission_classes=[CanViewStatistics])
+    def browse_responses(self, request, pk=None):
+        """
+        Respuestas individuales de la encuesta, de la más reciente a la más antigua.
+
+        Filtros: ``submitted_after``/``submitted_before`` (ISO 8601), ``email`` y
+        ``option`` (id de una opción elegida). Paginación por cursor sobre
+        (submitted_at, id).
+        """
+        survey = self.get_base_object()
+        filters = ResponseFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+
+        queryset = filter_responses(survey.responses.all(), **filters.validated_data)
+        paginator = ResponseCursorPagination()
+        page = paginator.paginate_queryset(response_detail_queryset(queryset), request, view=self)
+        serializer = ResponseDetailSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['post'], url_path='exports', permission_classes=[CanViewStatistics])
+    def start_export(self, request, pk=None):
+        """Iniciar la exportación a Excel en segundo plano (o reutilizar la vigente)"""
+        survey = self.get_object()
+        job = start_export(survey, request.user)
+        return DRFResponse(
+            ExportJobSerializer(job, context={'request': request}).data,
+            status=status.HTTP_200_OK if job.status == 'done' else status.HTTP_202_ACCEPTED
+        )
+
+    def get_export_job(self, job_id):
+        survey = self.get_object()
+        try:
+            return ExportJob.objects.get(id=job_id, survey=survey)
+        except (ExportJob.DoesNotExist, ValidationError):
+            raise NotFound('Exportación no encontrada.')
+
+    @action(detail=True, methods=['get'], url_path=r'exports/(?P<job_id>[0-9a-f-]+)',
+            permission_classes=[CanViewStatistics])
+    def export_status(self, request, pk=None, job_id=None):
+        """Estado y progreso de una exportación"""
+        job = self.get_export_job(job_id)
+        return DRFResponse(ExportJobSerializer(job, context={'request': request}).data)
+
+    @action(detail=True, methods=['get'], url_path=r'exports/(?P<job_id>[0-9a-f-]+)/download',
+            permission_classes=[CanViewStatistics])
+    def export_download(self, request, pk=None, job_id=None):
+        """Descargar el archivo de una exportación terminada"""
+        job = self.get_export_job(job_id)
+        if job.status != 'done':
+            return DRFResponse(
+                {'error': 'La exportación todavía no está lista.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        try:
+            file = open(job_path(job), 'rb')
+        except FileNotFoundError:
+            # Reemplazado por una exportación más reciente
+            return DRFResponse(
+                {'error': 'El archivo ya no está disponible; inicia una nueva exportación.'},
+                status=status.HTTP_410_GONE
+            )
+        return FileResponse(
+            file,
+            as_attachment=True,
+            filename=f'encuesta_{job.survey_id}.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+
 
 class SurveyPublicView(generics.RetrieveAPIView):
     """Vista pública para ver y responder encuestas"""
-    queryset = Survey.objects.prefetch_related(
-        'questions__options',
-        'questions__matrix_rows',
-        'questions__matrix_columns'
-    ).all()
+    # Las preguntas solo se cargan al renderizar el documento, que se cachea
+    queryset = Survey.objects.all()
     serializer_class = SurveyPublicSerializer
     permission_classes = [AllowAny]
     authentication_classes = []  # No requiere autenticación
@@ -461,14 +337,13 @@ class SurveyPublicView(generics.RetrieveAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        return super().get(request, *args, **kwargs)
+        return public_cache.document_response(public_cache.get_document(survey), request)
 
 
 @csrf_exempt
 def ResponseCreateView(request):
     """Vista para crear respuestas a encuestas (público - sin autenticación)"""
     from django.contrib.auth.models import AnonymousUser
-    from django.utils import timezone
     from rest_framework.request import Request
     from rest_framework.parsers import JSONParser
     
@@ -491,27 +366,9 @@ def ResponseCreateView(request):
         )
     
     # Verificar que la encuesta esté activa y dentro de las fechas
-    now = timezone.now()
-    
-    if not survey.is_active:
-        return JsonResponse(
-            {'error': 'Esta encuesta no está activa.'},
-            status=400
-        )
-    
-    if now < survey.start_date:
-        start_str = survey.start_date.isoformat() if hasattr(survey.start_date, 'isoformat') else str(survey.start_date)
-        return JsonResponse(
-            {'error': f'Esta encuesta aún no está disponible. Inicia el {start_str}.'},
-            status=400
-        )
-    
-    if now > survey.end_date:
-        end_str = survey.end_date.isoformat() if hasattr(survey.end_date, 'isoformat') else str(survey.end_date)
-        return JsonResponse(
-            {'error': f'Esta encuesta ya cerró el {end_str}.'},
-            status=400
-        )
+    closed_error = survey_closed_error(survey)
+    if closed_error:
+        return JsonResponse({'error': closed_error}, status=400)
     
     try:
         # Log para debug
@@ -520,7 +377,7 @@ def ResponseCreateView(request):
         logger.info(f'Datos recibidos: survey={data.get("survey")}, answers count={len(data.get("answers", []))}')
         logger.info(f'Datos completos: {json.dumps(data, default=str)}')
         
-        serializer = ResponseSerializer(data=data, context={'request': request})
+        serializer = ResponseSerializer(data=data, context={'request': request, 'survey': survey})
         if not serializer.is_valid():
             logger.error(f'Errores de validación: {serializer.errors}')
             return JsonResponse(
@@ -528,8 +385,16 @@ def ResponseCreateView(request):
                 status=400
             )
         
+        if spooling_enabled():
+            # Ingesta diferida: el worker drain_spool guardará la respuesta
+            get_spool().append(data, ip_address=request.META.get('REMOTE_ADDR'))
+            return JsonResponse(
+                {'message': 'Respuesta recibida exitosamente.'},
+                status=202
+            )
+        
         response_obj = serializer.save()
-        logger.info(f'Respuesta guardada: {response_obj.id}, respuestas creadas: {response_obj.answers.count()}')
+        logger.info(f'Respuesta guardada: {response_obj.id}, respuestas creadas: {len(serializer.validated_data["answers"])}')
         
         return JsonResponse(
             {'message': 'Respuesta guardada exitosamente.'},
@@ -546,3 +411,90 @@ def ResponseCreateView(request):
             status=400
         )
 
+
+@csrf_exempt
+def ResponseBatchCreateView(request):
+    """
+    Crear muchas respuestas en una sola petición (recolección offline/kiosco).
+
+    Acepta una lista de respuestas (o {"responses": [...]}) de una o varias
+    encuestas. Las encuestas se cargan con una sola consulta, cada respuesta
+    se valida con el esquema compilado de su encuesta y las válidas se
+    insertan por bloques con operaciones masivas. Devuelve el resultado de
+    cada elemento en el mismo orden.
+    """
+    import logging
+    logger = logging.getLogger(__name__)
+
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Método no permitido'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'JSON inválido'}, status=400)
+
+    items = data.get('responses') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return JsonResponse({'error': 'Se esperaba una lista de respuestas.'}, status=400)
+    max_items = settings.SURVEY_BATCH_MAX_ITEMS
+    if len(items) > max_items:
+        return JsonResponse(
+            {'error': f'Máximo {max_items} respuestas por lote.'},
+            status=400
+        )
+
+    # Una sola consulta para todas las encuestas del lote
+    # Ids normalizados (survey_key): mayúsculas o llaves como en el envío individual
+    survey_ids = {
+        survey_key(item.get('survey')) for item in items if isinstance(item, dict)
+    } - {None}
+    surveys = {survey_key(s.id): s for s in Survey.objects.filter(id__in=survey_ids)}
+    closed_errors = {survey_id: survey_closed_error(s) for survey_id, s in surveys.items()}
+
+    results = [None] * len(items)
+    pending = []
+    context = {'request': request, 'surveys': surveys}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = {'index': index, 'status': 400, 'error': 'Elemento inválido.'}
+            continue
+        closed_error = closed_errors.get(survey_key(item.get('survey')))
+        if closed_error:
+            results[index] = {'index': index, 'status': 400, 'error': closed_error}
+            continue
+        serializer = ResponseSerializer(data=item, context=context)
+        if not serializer.is_valid():
+            results[index] = {'index': index, 'status': 400, 'error': serializer.errors}
+            continue
+        pending.append((index, serializer.build(serializer.validated_data)))
+
+    chunk_size = settings.SURVEY_BATCH_CHUNK_SIZE
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        try:
+            saved = save_responses([built for _, built in chunk])
+        except Exception as e:
+            # Reintentar de a uno para aislar el elemento que falla
+            logger.error(f'Error guardando bloque del lote: {str(e)}')
+            saved = []
+            for index, built in chunk:
+                try:
+                    saved.extend(save_responses([built]))
+                except Exception as item_error:
+                    saved.append(None)
+                    results[index] = {
+                        'index': index, 'status': 400,
+                        'error': f'Error al guardar la respuesta: {str(item_error)}'
+                    }
+        for (index, _), response_obj in zip(chunk, saved):
+            if response_obj is not None:
+                results[index] = {'index': index, 'status': 201, 'id': response_obj.id}
+
+    created = sum(1 for result in results if result['status'] == 201)
+    logger.info(f'Lote procesado: {created} guardadas, {len(items) - created} con errores')
+    return JsonResponse({
+        'created': created,
+        'failed': len(items) - created,
+        'results': results,
+    }, status=200)
@@ -44,6 +44,7 @@ export interface Survey {
   assigned_viewers?: number[]
   is_open?: boolean
   total_responses?: number
+  question_count?: number
 }
 
 export interface SurveyCreate {